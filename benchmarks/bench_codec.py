@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libkahoot import codec
+
+"""
+Micro-benchmark for the JSON codec.
+
+Decodes a '/connect' response carrying Kahoot events(events.json),
+the way every event is decoded on its way to the handlers:
+The response body is decoded by URLWrap, and the content of each event is decoded when a handler reads it.
+The time is given per event, with the json module and with the accelerated library.
+
+Run from the repository root:
+
+    python benchmarks/bench_codec.py
+"""
+
+EVENTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'events.json')  # Sample '/connect' response
+
+
+def decode_response(raw):
+
+    # Decodes a response body and the content of every event in it
+
+    for message in codec.loads(raw):
+
+        data = message.get('data')
+
+        if isinstance(data, dict) and 'content' in data:
+
+            codec.loads(data['content'])
+
+
+def main():
+
+    with open(EVENTS) as file:
+
+        messages = json.load(file)
+
+    raw = json.dumps(messages, separators=(',', ':')).encode('utf-8')
+    events = sum(1 for message in messages if 'data' in message)
+    number = 20000
+
+    print("{} messages, {} events, {} bytes".format(len(messages), events, len(raw)))
+
+    modes = [False, True] if codec.FAST_AVAILABLE else [False]
+
+    for fast in modes:
+
+        codec.set_fast(fast)
+
+        took = min(timeit.repeat(lambda: decode_response(raw), number=number, repeat=5)) / number
+
+        print("{:>6}: {:.2f} us per event".format('fast' if fast else 'json', took / events * 1e6))
+
+    if not codec.FAST_AVAILABLE:
+
+        print("No accelerated JSON library is installed, install orjson to compare")
+
+    codec.set_fast(True)
+
+
+if __name__ == '__main__':
+
+    main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import base64
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libkahoot.api import decode_session
+
+"""
+Micro-benchmark for decoding session tokens.
+
+Times 'decode_session' across token lengths,
+next to the byte by byte XOR it replaced.
+
+Run from the repository root:
+
+    python benchmarks/bench_session.py
+"""
+
+CHALLENGE = 'r:Q0dW<]3?hKL9aEH`F[fLbQ4PD6?jW_vB7nRnX^J5o2@dG_Wnb\\ITTYnV:T4kJ9:rC;Mq2e8f]X6kLg^Fd>'  # Solved challenge
+LENGTHS = (16, 64, 256, 1024, 4096)  # Token lengths to time, in bytes
+
+
+def decode_loop(raw_session, challenge):
+
+    # Decodes a session token one byte at a time, like '_session_format' used to
+
+    session = base64.b64decode(raw_session)
+    chars = []
+
+    for num, byte in enumerate(session):
+
+        chars.append(byte ^ ord(challenge[num % len(challenge)]))
+
+    return bytes(chars).decode('ascii')
+
+
+def make_token(length):
+
+    # Makes a raw session token that decodes to 'length' ASCII characters
+
+    session = bytes(48 + (num % 75) for num in range(length))
+    key = CHALLENGE.encode('ascii')
+
+    return base64.b64encode(bytes(byte ^ key[num % len(key)] for num, byte in enumerate(session))).decode('ascii')
+
+
+def main():
+
+    print("{:>8} {:>14} {:>14} {:>8}".format('Length', 'Bulk(us)', 'Loop(us)', 'Speedup'))
+
+    for length in LENGTHS:
+
+        raw = make_token(length)
+
+        assert decode_session(raw, CHALLENGE) == decode_loop(raw, CHALLENGE)
+
+        number = max(100, 200000 // length)
+        bulk = min(timeit.repeat(lambda: decode_session(raw, CHALLENGE), number=number, repeat=5)) / number * 1e6
+        loop = min(timeit.repeat(lambda: decode_loop(raw, CHALLENGE), number=number, repeat=5)) / number * 1e6
+
+        print("{:>8} {:>14.2f} {:>14.2f} {:>7.1f}x".format(length, bulk, loop, loop / bulk))
+
+
+if __name__ == '__main__':
+
+    main()
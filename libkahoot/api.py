@@ -1,263 +1,1378 @@
+import sys
 import time
-import json
 import re
+import ast
+import math
+import operator
 import base64
 import threading  # TODO: REMOVE THREADING SUPPORT
-import array
 import asyncio
+from functools import lru_cache
+from collections import deque
 
-from libkahoot import knet
+from libkahoot import knet, codec
+from libkahoot.metrics import Metrics
 
 """
 Tools for interacting with the Kahoot API.
 Answer questions, join games, ect.
 """
 
+_ARM_SENTINEL = 918273645  # Placeholder choice we split prepared answer payloads around
+
+_BINARY_OPS = {ast.Add: operator.add,
+               ast.Sub: operator.sub,
+               ast.Mult: operator.mul,
+               ast.Div: operator.truediv,
+               ast.Mod: operator.mod}  # Binary operators allowed in challenge expressions
+
+_UNARY_OPS = {ast.UAdd: operator.pos,
+              ast.USub: operator.neg}  # Unary operators allowed in challenge expressions
+
+_NUMBER_NODE = ast.Num if sys.version_info < (3, 8) else ast.Constant  # Node numbers are parsed as(ast.Num on 3.7)
+
+
+@lru_cache(maxsize=64)
+def _parse_expression(expr):
+
+    """
+    Parses an arithmetic expression, and checks that it only contains what we allow.
+    The parsed form is cached by expression text.
+
+    :param expr: Expression to parse
+    :type expr: str
+    :return: Root node of the parsed expression
+    :rtype: ast.AST
+    :raises ValueError: If the expression is invalid, or contains anything but arithmetic
+    """
+
+    try:
+
+        node = ast.parse(expr.strip(), mode='eval').body
+
+    except (SyntaxError, RecursionError, MemoryError):
+
+        raise ValueError("Invalid challenge expression: {}".format(expr))
+
+    for sub in ast.walk(node):
+
+        if isinstance(sub, ast.BinOp) and type(sub.op) in _BINARY_OPS:
+
+            continue
+
+        if isinstance(sub, ast.UnaryOp) and type(sub.op) in _UNARY_OPS:
+
+            continue
+
+        if isinstance(sub, _NUMBER_NODE) and type(_node_number(sub)) in (int, float):
+
+            continue
+
+        if isinstance(sub, (ast.operator, ast.unaryop)):
+
+            # Operators are checked with their parent node
+
+            continue
+
+        raise ValueError("Disallowed node in challenge expression: {}".format(type(sub).__name__))
+
+    return node
+
+
+def _eval_node(node):
+
+    # Evaluates a node checked by '_parse_expression'
+
+    if isinstance(node, ast.BinOp):
+
+        return _BINARY_OPS[type(node.op)](_eval_node(node.left), _eval_node(node.right))
+
+    if isinstance(node, ast.UnaryOp):
+
+        return _UNARY_OPS[type(node.op)](_eval_node(node.operand))
+
+    return _node_number(node)
+
+
+def _node_number(node):
+
+    # Gets the number held by a number node, ast.Num keeps it in 'n'
+
+    return node.n if _NUMBER_NODE is not ast.Constant else node.value
+
+
+def evaluate_expression(expr):
+
+    """
+    Safely evaluates an arithmetic expression.
+    Only numbers, parentheses, and the operators '+', '-', '*', '/' and '%' are allowed.
+
+    :param expr: Expression to evaluate
+    :type expr: str
+    :return: Value of the expression
+    :rtype: int, float
+    :raises ValueError: If the expression is invalid
+    """
+
+    try:
+
+        return _eval_node(_parse_expression(expr))
+
+    except ZeroDivisionError:
+
+        raise ValueError("Division by zero in challenge expression: {}".format(expr))
+
+    except (OverflowError, RecursionError):
+
+        raise ValueError("Challenge expression is too large: {}".format(expr))
+
+
+def solve_challenge(chall):
+
+    """
+    Solves a Kahoot challenge.
+    The challenge is a snippet of JavaScript containing an encoded message,
+    and an expression for the offset used to decode it.
+    We never execute the JavaScript, we only evaluate the offset expression.
+
+    :param chall: Challenge given to us by Kahoot
+    :type chall: str
+    :return: Decoded challenge
+    :rtype: str
+    :raises ValueError: If the challenge is malformed
+    """
+
+    # Cleaning up string by removing un-wanted contents, and splitting it up:
+
+    chall_list = re.sub('[^!-~]+', ' ', chall).strip().split(';')
+
+    if len(chall_list) < 2:
+
+        raise ValueError("Invalid challenge: {}".format(chall))
+
+    # Getting encoded string and challenge expression:
+
+    chall_str = chall_list[0][chall_list[0].find("'") + len("'"):chall_list[0].rfind("'")]
+    offset = evaluate_expression(chall_list[1][chall_list[1].find(" = ") + len(" = "):])
+
+    if not math.isfinite(offset) or offset != int(offset):
+
+        raise ValueError("Challenge offset is not an integer: {}".format(offset))
+
+    offset = int(offset)
+
+    # Applying pattern to every byte of the encoded string:
+
+    return bytes((((char * position) + offset) % 77) + 48
+                 for position, char in enumerate(chall_str.encode('ascii'))).decode('ascii')
+
+
+def decode_session(raw_session, challenge):
+
+    """
+    Decodes a raw Kahoot session token using the solved challenge.
+    The token is base64 decoded, and XORed with the challenge repeated over its length.
+    The XOR is done in one go over the whole token.
+
+    :param raw_session: Raw session token, taken from the 'x-kahoot-session-token' header
+    :type raw_session: str
+    :param challenge: Solved challenge
+    :type challenge: str
+    :return: Decoded session token
+    :rtype: str
+    :raises ValueError: If the challenge is empty
+    """
+
+    session = base64.b64decode(raw_session)
+    key = str(challenge).encode('ascii')
+
+    if not key:
+
+        raise ValueError("Can't decode a session with an empty challenge")
+
+    length = len(session)
+    key = (key * (length // len(key) + 1))[:length]
+
+    return (int.from_bytes(session, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big').decode('ascii')
+
+
+class TimeSync(object):
+
+    """
+    Estimates the offset between our clock and the Kahoot server clock,
+    as well as the network latency, using the CometD timesync extension.
+
+    Every handshake and connect reply carries the time we sent the request('tc'),
+    the server time when it was received('ts'), and how long the server held it('p').
+    Samples are kept in a sliding window. As samples with a shorter round trip are less skewed,
+    we average the offset and latency of the faster half of the window.
+    """
+
+    def __init__(self, window=10):
+
+        self.window = window  # Number of samples we keep
+        self.latency = 0  # Estimated one-way latency, in milliseconds
+        self.offset = 0  # Estimated offset of the server clock from ours, in milliseconds
+        self._samples = deque(maxlen=window)  # Sliding window of (latency, offset) samples
+
+    def update(self, message):
+
+        """
+        Updates the estimates using the timesync info of a reply, if it has any.
+
+        :param message: CometD reply to get timesync info from
+        :type message: dict
+        :return: True if the estimates were updated, False otherwise
+        :rtype: bool
+        """
+
+        sync = (message.get('ext') or {}).get('timesync')
+
+        if not sync or 'ts' not in sync or 'tc' not in sync:
+
+            # No timesync info here
+
+            return False
+
+        now = self.now()
+        latency = (now - sync['tc'] - sync.get('p', 0)) / 2
+
+        self._samples.append((latency, sync['ts'] - sync['tc'] - latency))
+
+        # Using the fastest half of the window:
+
+        best = sorted(self._samples)[:len(self._samples) // 2 + 1]
+
+        self.latency = sum(sample[0] for sample in best) / len(best)
+        self.offset = sum(sample[1] for sample in best) / len(best)
+
+        return True
+
+    def get_ext(self):
+
+        """
+        Gets the timesync info to attach to an outgoing message.
+
+        :return: Dictionary containing our time, latency and offset
+        :rtype: dict
+        """
+
+        return {"l": int(round(self.latency)), "o": int(round(self.offset)), "tc": self.now()}
+
+    def get_lag(self):
+
+        """
+        Gets the lag to report when answering questions.
+
+        :return: Estimated latency, in milliseconds
+        :rtype: int
+        """
+
+        return int(round(self.latency))
+
+    def server_time(self):
+
+        """
+        Gets the current time on the server clock.
+
+        :return: Server time, in milliseconds since the epoch
+        :rtype: int
+        """
+
+        return int(round(self.now() + self.offset))
+
+    @staticmethod
+    def now():
+
+        # Gets our time, in milliseconds since the epoch
+
+        return int(time.time() * 1000)
+
+
+class AckTracker(object):
+
+    """
+    Keeps track of the messages the server has delivered to us,
+    so that duplicates are dropped and events are delivered in order.
+
+    Messages carrying an ID are remembered in a bounded window, and IDs we have already seen are dropped.
+    Connect replies carry the batch number of their messages through the CometD ack extension.
+    Batches we have already delivered are dropped, and a batch that arrives ahead of a missing one
+    is held back until the missing batch turns up, or until we are told not to wait.
+    """
+
+    def __init__(self, window=512):
+
+        self.window = window  # Number of message IDs we remember
+        self.delivered = None  # Highest batch number we have delivered
+        self._seen = set()  # Message IDs in our window
+        self._order = deque()  # Message IDs in our window, oldest first
+        self._held = {}  # Dictionary mapping batch numbers to the messages held back
+
+    def is_duplicate(self, message):
+
+        """
+        Determines if we have already seen a message, and remembers it if we have not.
+
+        :param message: Message to check
+        :type message: dict
+        :return: True if the message is a duplicate, False otherwise
+        :rtype: bool
+        """
+
+        if message.get('id') is None:
+
+            # Nothing to go off of
+
+            return False
+
+        key = (message.get('channel'), str(message['id']))
+
+        if key in self._seen:
+
+            return True
+
+        self._seen.add(key)
+        self._order.append(key)
+
+        if len(self._order) > self.window:
+
+            self._seen.discard(self._order.popleft())
+
+        return False
+
+    def accept(self, batch, messages, wait=True):
+
+        """
+        Accepts the messages of a connect reply, and gets the messages that can be delivered now.
+
+        :param batch: Batch number of the messages, None if the server did not give us one
+        :type batch: int
+        :param messages: Messages of the batch
+        :type messages: list
+        :param wait: Boolean determining if we may hold back batches that arrive ahead of a missing one
+        :type wait: bool
+        :return: Messages to deliver, in order
+        :rtype: list
+        """
+
+        if batch is None:
+
+            return list(messages)
+
+        if self.delivered is not None and batch <= self.delivered:
+
+            # Already delivered this batch
+
+            return []
+
+        if self.delivered is None:
+
+            # First batch we have seen
+
+            self.delivered = batch - 1
+
+        self._held[batch] = messages
+
+        return self._release(wait)
+
+    def flush(self):
+
+        """
+        Gets every held back message, giving up on any missing batches.
+
+        :return: Messages to deliver, in order
+        :rtype: list
+        """
+
+        return self._release(False)
+
+    def pending(self):
+
+        """
+        Determines if we are holding back any batches.
+
+        :return: True if we are, False otherwise
+        :rtype: bool
+        """
+
+        return bool(self._held)
+
+    def reset(self):
+
+        """
+        Forgets everything, used when we get a new client ID.
+        """
+
+        self.delivered = None
+
+        self._seen.clear()
+        self._order.clear()
+        self._held.clear()
+
+    def _release(self, wait):
+
+        # Releases held batches in order
+        # If 'wait' is True, we stop at the first missing batch
+
+        ready = []
+
+        for batch in sorted(self._held):
+
+            if wait and batch != self.delivered + 1:
+
+                break
+
+            ready.extend(self._held.pop(batch))
+
+            self.delivered = batch
+
+        return ready
+
 
 class KahootAPI(object):
 
-    def __init__(self, pin, queue, name):
+    """
+    Talks to the Kahoot CometD API.
+
+    We support two CometD transports:
+
+        * 'long-polling' - Every message is a HTTP POST, and we poll '/connect' for events
+        * 'websocket' - All messages share one websocket, and events are pushed to us as they happen
+
+    By default we talk to 'https://kahoot.it/'. Use 'url' to talk to another server instead(Such as a local stand-in),
+    and 'ws_url' to use a websocket URL that is not generated from it.
+    """
+
+    TRANSPORTS = ('long-polling', 'websocket')  # Supported CometD transports
+
+    def __init__(self, pin, queue, name, transport='long-polling', batch_window=0.005, timesync_window=10,
+                 overlap_polls=False, dedupe_window=512, reorder_timeout=0.5, network_delay=10, stall_deadline=5,
+                 url='https://kahoot.it/', ws_url=None):
+
+        if transport not in self.TRANSPORTS:
+
+            raise ValueError("Invalid transport: {}".format(transport))
+
+        self.name = name  # Name to use
+        self.pin = pin  # Game pin of our Kahoot Game
+        self.metrics = Metrics()  # Timings and counters of our connection
+        self._req = knet.URLWrap(queue, metrics=self.metrics)  # Instance of our URLWrapper for HTTP Requests
+        self._transport = transport  # CometD transport we are using
+        self._comet = self._req if transport == 'long-polling' else \
+            knet.WebSocketWrap(self._req, url=ws_url, on_push=self._push)  # CometD sender
+        self._raw_kahoot_session = ''  # Raw session token, to be decoded
+        self._kahoot_session = ''  # Decoded session token
+        self._challenge = ''  # Challenge string used to decode raw Kahoot session
+        self._client_id = ''  # Our unique client ID
+        self._ack_id = 1  # Acknowledgement ID
+        self._server_ack = None  # Last batch number the server gave us through the ack extension
+        self._sub_id = 12  # Subscription ID
+        self._url = url  # Base URL that we can build off of
+        self._active_api = False  # Value determining if we are actively connected/connecting
+        self.two_auth = False  # Boolean determining if we have authenticated using two factor authentication
+        self._queue_api = queue  # Queue of game play packets from the Kahoot API
+        self._thread_api = None  # Instance of our continuous connection thread
+        self._connect_task = None  # Task running our continuous connection
+        self.batch_window = batch_window  # Seconds we wait for more outgoing messages before sending a batch
+        self._send_queue = asyncio.Queue()  # Queue of outgoing messages waiting to be batched
+        self._writer_task = None  # Task that collects outgoing messages into batches
+        self._batch_tasks = set()  # Tasks sending batches of outgoing messages
+        self._warm_tasks = set()  # Tasks warming spare connections
+        self.join_timings = {}  # Dictionary mapping join phases to the milliseconds they took
+        self.timesync = TimeSync(window=timesync_window)  # Estimator for server clock offset and latency
+        self._armed = None  # Prepared answer, tuple of (payload prefix, payload suffix, URL, reply keys)
+        self.overlap_polls = overlap_polls  # Boolean determining if we keep a second '/connect' poll in flight
+        self._polls = 0  # Number of '/connect' polls in flight
+        self._poll_idle = None  # Time when we last had no polls in flight
+        self._generation = 0  # Number of times we have reconnected, used to spot reconnects by others
+        self._reconnect_lock = asyncio.Lock()  # Lock ensuring that only one reconnect runs at a time
+        self._reconnect_failure = None  # Dictionary describing why the last reconnect failed
+        self._acks = AckTracker(window=dedupe_window)  # Tracker for dropping duplicate and reordered messages
+        self.reorder_timeout = reorder_timeout  # Seconds we hold back a batch that arrived ahead of a missing one
+        self._reorder_task = None  # Task that gives up on missing batches
+        self.advice = {"interval": 0, "timeout": 60000, "reconnect": "retry"}  # Active CometD advice from the server
+        self.network_delay = network_delay  # Seconds we allow for the network, on top of how long polls are held
+        self.stall_deadline = stall_deadline  # Seconds past the poll timeout before a poll counts as stalled
+
+        self._req.timeout = network_delay
+        self._req.url = url
+
+    def _get_sub_id(self):
+
+        # Getting a new message ID here
+
+        self._sub_id += 1
+
+        return str(self._sub_id)
+
+    def _get_ack_id(self):
+
+        # Getting Acknowledgement value here
+        # Once the server gives us batch numbers, we acknowledge the last batch we got
+
+        if self._server_ack is not None:
+
+            return self._server_ack
+
+        self._ack_id += 1
+
+        return self._ack_id
+
+    def _get_id_payload(self):
+
+        # Generates payload for getting the Kahoot client ID
+
+        return [{"advice": {"interval": 0, "timeout": 60000}, "channel": "/meta/handshake",
+                 "ext": {"ack": self._get_ack_id(), "timesync": self.timesync.get_ext()}, "id": "2",
+                 "minimumVersion": "1.0", "supportedConnectionTypes": self._get_connection_types(), "version": "1.0"}]
+
+    def _get_connection_types(self):
+
+        # Gets the connection types we support, preferred type first
+
+        if self._transport == 'websocket':
+
+            return ['websocket', 'long-polling']
+
+        return ['long-polling']
+
+    def _get_name_payload(self, name):
+
+        # Generates payload for setting our name
+
+        return [{"channel": "/service/controller", "clientId": self._client_id,
+                 "data": {"gameid": str(self.pin), "host": "kahoot.it",
+                          "name": str(name), "type": "login"}, "id": self._get_sub_id()}]
+
+    def _get_disconnect_payload(self):
+
+        # Generates payload for disconnecting from a Kahoot game
+
+        return [{"channel": "/meta/disconnect", "clientId": self._client_id}]
+
+    def _get_sub_payload(self, chan, sub):
+
+        # Generates payload for subscribing to a specified channel
+
+        sub_id = self._get_sub_id()
+
+        return [{"channel": "/meta/" + chan, "clientId": self._client_id,
+                 "ext": {"timesync": self.timesync.get_ext()}, "id": sub_id,
+                 "subscription": "/service/" + sub}]
+
+    def _get_con_payload(self, timeout=None):
+
+        # Generates payload for polling '/connect'
+        # 'timeout' - Milliseconds the server may hold the poll for, leave blank for the server default
+
+        sub_id = self._get_sub_id()
+
+        payload = [{"channel": "/meta/connect", "clientId": self._client_id, "connectionType": self._transport,
+                    "ext": {"ack": self._get_ack_id(), "timesync": self.timesync.get_ext()},
+                    "id": sub_id}]
+
+        if timeout is not None:
+
+            payload[0]["advice"] = {"timeout": timeout}
+
+        return payload
+
+    def _get_answer_payload(self, choice):
+
+        # Generates payload for answering a question
+        # 'choice' MUST be an integer and it MUST be a valid option!
+
+        sub_id = self._get_sub_id()
+
+        innerdata = {"choice": choice, "meta": {"lag": self.timesync.get_lag(),
+                                                "device": {"userAgent": "bigup_UK_grime",
+                                                           "screen": {"width": 1920, "height": 1080}}}}
+
+        innerdata = codec.dumps(innerdata)
+
+        return [{"channel": "/service/controller", "clientId": self._client_id,
+                 "data": {"content": innerdata, "gameid": self.pin, "host": "kahoot.it", "id": 6, "type": "message"},
+                 "id": sub_id}]
+
+    def _get_two_auth_payload(self, seq):
+
+        # Generates two factor authentication payload
+        # 'seq' MUST be a valid Kahoot two-factor-auth sequence!
+
+        innerdata = codec.dumps({"sequence": seq})
+
+        return [{"channel": "/service/controller", "clientId": self._client_id,
+                 "data": {"id": 50, "type": "message", "gameid": self.pin, "host": "kahoot.it",
+                          "content": innerdata}, "id": self._get_sub_id()}]
+
+    async def _send_message(self, payload):
+
+        """
+        Queues CometD messages to be sent in the next batch, and waits for their replies.
+        Messages queued together are sent in a single request,
+        and if more messages keep coming we wait up to 'batch_window' seconds to collect them.
+        A message queued on its own is sent straight away.
+
+        :param payload: List of CometD messages to send
+        :type payload: list
+        :return: Tuple containing a boolean determining if we were successful, and the list of replies
+        :rtype: tuple
+        """
+
+        if self._writer_task is None or self._writer_task.done():
+
+            # Starting our writer
+
+            self._writer_task = asyncio.ensure_future(self._writer())
+
+        fut = asyncio.get_event_loop().create_future()
+
+        await self._send_queue.put((payload, fut))
+
+        return await fut
+
+    async def _writer(self):
+
+        # Function for collecting outgoing messages into batches
+        # Each batch is sent by its own task, so a slow request never holds up the next one
+
+        loop = asyncio.get_event_loop()
+
+        while True:
+
+            batch = [await self._send_queue.get()]
+
+            try:
+
+                # Giving everyone queuing at the same time a chance to add to this batch:
+
+                await asyncio.sleep(0)
+
+                deadline = loop.time() + self.batch_window
+
+                while not self._send_queue.empty():
+
+                    while not self._send_queue.empty():
+
+                        batch.append(self._send_queue.get_nowait())
+
+                    # More messages are coming, waiting a little for the rest of them:
+
+                    if loop.time() >= deadline:
+
+                        break
+
+                    await asyncio.sleep(min(self.batch_window / 5, deadline - loop.time()))
+
+            except asyncio.CancelledError:
+
+                # We are being stopped, nobody in this batch gets a reply
+
+                for payload, fut in batch:
+
+                    fut.cancel()
+
+                raise
+
+            task = asyncio.ensure_future(self._send_batch(batch))
+
+            # Keeping a reference, so the task isn't garbage collected
+
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch):
+
+        # Sends a batch of outgoing messages in one request
+        # Hands everyone in the batch their replies, and pushes anything else the server sent
+
+        messages = [message for payload, fut in batch for message in payload]
+
+        # Controller messages(Logins, answers, two-factor codes) must never be sent twice
+
+        retries = 0 if any(message.get('channel') == '/service/controller' for message in messages) else None
+
+        try:
+
+            val, response = await self._comet.send(data=messages, retries=retries)
+
+        except asyncio.CancelledError:
+
+            # We are being stopped, nobody in this batch gets a reply
+
+            for payload, fut in batch:
+
+                fut.cancel()
+
+            raise
+
+        except Exception as e:
+
+            # Unexpected error, handing it to everyone in this batch
+
+            for payload, fut in batch:
+
+                if not fut.done():
+
+                    fut.set_exception(e)
+
+            return
+
+        if not val:
+
+            # Error occurred, everyone in this batch failed
+
+            for payload, fut in batch:
+
+                if not fut.done():
+
+                    fut.set_result((False, payload))
+
+            return
+
+        # Matching replies to the messages we sent:
+
+        keys = [[(message.get('channel'), str(message.get('id'))) for message in payload] for payload, fut in batch]
+
+        for (payload, fut), found in zip(batch, await self._match_replies(keys, response)):
+
+            if not fut.done():
+
+                fut.set_result((True, found))
+
+    async def _match_replies(self, keys, response):
+
+        """
+        Matches the replies in a response to the messages we sent.
+        Anything in the response that is not a reply is a server push, and is handed to '_push'.
+
+        :param keys: List containing a list of the (channel, ID) pairs of each sender's messages
+        :type keys: list
+        :param response: List of messages the server sent back
+        :type response: list
+        :return: List containing a list of the replies to each sender's messages
+        :rtype: list
+        """
+
+        replies = {}
+
+        for message in response:
+
+            replies[(message.get('channel'), str(message.get('id')))] = message
+
+        found = [[replies.pop(key) for key in sender if key in replies] for sender in keys]
+
+        # Anything left over is a server push:
+
+        for message in replies.values():
+
+            if not message.get('channel', '').startswith('/meta/'):
+
+                await self._push(message)
+
+        return found
+
+    async def _push(self, message):
+
+        """
+        Handles a message pushed to us by the server, and puts it into the event queue.
+        Every server push passes through here, no matter the transport.
+
+        When a question starts, we prepare an answer so it can be sent as soon as we have a choice.
+
+        :param message: Message pushed by the server
+        :type message: dict
+        """
+
+        if self._acks.is_duplicate(message):
+
+            # Already delivered this one
+
+            self.metrics.count('duplicates_dropped')
+
+            return
+
+        data = message.get('data')
+
+        if isinstance(data, dict) and (data.get('id') == 1 or (data.get('id') == 2 and self._armed is None)):
+
+            # Question is starting, arming our answer
+
+            self.arm_answer()
+
+        await self._queue_api.put(message)
+
+    async def _continuous_connect(self):
+
+        # Function for fetching game packets
+        # Continuously polls kahoot for more game information
+        # If 'overlap_polls' is set, a second poll is kept in flight,
+        # so events published while one poll is being answered don't wait for a full round-trip
+
+        pollers = [self._poll()]
+
+        if self.overlap_polls and self._comet is self._req:
+
+            # Only long-polling has a gap to cover
+
+            pollers.append(self._poll(overlap=True))
+
+        await asyncio.gather(*pollers)
+
+    async def _poll(self, overlap=False):
+
+        # Function for polling '/connect' until we stop
+        # 'overlap' - If this is the extra poll, which stops when overlapping is turned off
+
+        while self._active_api:
+
+            if overlap and not self.overlap_polls:
+
+                # Server doesn't want us overlapping
+
+                return
+
+            data = self._get_con_payload()
+            url = self._url + 'cometd/' + str(self.pin) + '/' + self._kahoot_session + '/connect'
+            generation = self._generation
+
+            self._poll_started()
+
+            try:
+
+                val, response = await self._watch_poll(url, data)
+
+            finally:
+
+                self._poll_finished()
+
+            if val is None:
+
+                # Poll stalled, starting a new one
+
+                continue
+
+            if val and not await self._connect_response(response):
+
+                # Server rejected our poll
+
+                val = False
+
+            if not val:
+
+                # Error occurred, reconnecting
+
+                if not self._active_api:
+
+                    return
+
+                if not await self.reconnect(generation):
+
+                    # Can't get back in, stopping
+
+                    await self._connection_lost('Reconnect failed', self._reconnect_failure)
+
+                    return
+
+                continue
+
+            if self.advice['reconnect'] == 'none':
+
+                # Server wants us gone
+
+                print("Server advised us not to reconnect, stopping")
+
+                await self._connection_lost('Server advised us not to reconnect', None)
+
+                return
+
+            if self.advice['interval'] > 0:
+
+                # Waiting as long as the server asks before polling again
+
+                await asyncio.sleep(self.advice['interval'] / 1000)
+
+    async def _connect_response(self, response):
+
+        """
+        Handles the response to a '/connect' poll.
+        Events are delivered in batch order, with duplicates dropped.
+        While another poll is in flight, a batch that arrived ahead of a missing one is held back,
+        as the missing batch is most likely in the other poll.
+
+        :param response: Messages of the response
+        :type response: list
+        :return: True if the server accepted our poll, False otherwise
+        :rtype: bool
+        """
+
+        accepted = True
+        sent = None
+        batch = None
+        events = []
+
+        for x in response:
+
+            if x['channel'] == '/meta/connect':
+
+                sent = self._connect_reply(x)
+                batch = (x.get('ext') or {}).get('ack')
+                accepted = accepted and x.get('successful', True)
+
+            else:
+
+                events.append(x)
+
+        if not isinstance(batch, int) or isinstance(batch, bool):
+
+            batch = None
+
+        for x in self._acks.accept(batch, events, wait=self._polls > 0):
+
+            await self._push(x)
+
+            if sent is not None:
+
+                # Time from the server sending the event, to it being in our queue
+
+                self.metrics.timing('push_latency', self.timesync.server_time() - sent)
+
+        if self._acks.pending() and (self._reorder_task is None or self._reorder_task.done()):
+
+            self._reorder_task = asyncio.ensure_future(self._reorder_timeout())
+
+        return accepted
+
+    async def _reorder_timeout(self):
+
+        # Gives up on missing batches after a while, delivering everything held back
+
+        await asyncio.sleep(self.reorder_timeout)
+
+        for x in self._acks.flush():
+
+            await self._push(x)
+
+    async def reconnect(self, generation=None):
+
+        """
+        Gets us back into the game after our connection was lost.
+        We try the cheapest way back first:
+
+            1. Poll '/connect' again with our existing client ID
+            2. Handshake again on our existing session token, then log in and resubscribe
+            3. Rejoin the game, reserving a new session
+
+        Reconnect times and attempts are recorded in 'metrics'.
+
+        :param generation: Reconnect generation the caller saw before failing,
+        if someone else reconnected since then we do nothing
+        :type generation: int
+        :return: True if we got back in, False otherwise
+        :rtype: bool
+        """
+
+        async with self._reconnect_lock:
+
+            if generation is not None and generation != self._generation:
+
+                # Someone else already reconnected
+
+                return True
+
+            if self.advice['reconnect'] == 'none':
+
+                # Server does not want us back
+
+                self.metrics.count('reconnect_refused')
+
+                self._reconnect_failure = {'refused': True, 'attempted': []}
+
+                return False
+
+            start = time.perf_counter()
+            attempted = []
+
+            self.metrics.count('reconnect_attempts')
+
+            for method, attempt in (('retry', self._retry_connect), ('handshake', self._rehandshake),
+                                    ('rejoin', self._rejoin)):
+
+                if method == 'retry' and self.advice['reconnect'] == 'handshake':
 
-        self.name = name  # Name to use
-        self.pin = pin  # Game pin of our Kahoot Game
-        self._req = knet.URLWrap(queue)  # Instance of our URLWrapper for HTTP Requests
-        self._raw_kahoot_session = ''  # Raw session token, to be decoded
-        self._kahoot_session = ''  # Decoded session token
-        self._challenge = ''  # Challenge string used to decode raw Kahoot session
-        self._client_id = ''  # Our unique client ID
-        self._ack_id = 1  # Acknowledgement ID
-        self._sub_id = 12  # Subscription ID
-        self._url = "https://kahoot.it/"  # Base URL that we can build off of
-        self._active_api = False  # Value determining if we are actively connected/connecting
-        self.two_auth = False  # Boolean determining if we have authenticated using two factor authentication
-        self._queue_api = queue  # Queue of game play packets from the Kahoot API
-        self._thread_api = None  # Instance of our continuous connection thread
+                    # Server wants a new handshake, retrying is pointless
 
-    def _get_timecode(self):
+                    continue
 
-        # Getting time code to ensure that we are in sync with Kahoot.
+                attempted.append(method)
 
-        return int(time.time() * 1000)
+                if await attempt():
 
-    def _get_ack_id(self):
+                    # We are back in
 
-        # Getting Acknowledgement value here
+                    self._generation += 1
 
-        self._ack_id += 1
+                    self.metrics.count('reconnect_' + method)
+                    self.metrics.timing('reconnect_time', (time.perf_counter() - start) * 1000)
 
-        return self._ack_id
+                    return True
 
-    def _get_id_payload(self):
+            self.metrics.count('reconnect_failed')
 
-        # Generates payload for getting the Kahoot client ID
+            self._reconnect_failure = {'refused': False, 'attempted': attempted,
+                                       'elapsed': (time.perf_counter() - start) * 1000}
 
-        return [{"advice": {"interval": 0, "timeout": 60000}, "channel": "/meta/handshake",
-                 "ext": {"ack": self._get_ack_id(), "timesync":
-                     {"l": 1, "o": -14, "tc": self._get_timecode()}}, "id": "2",
-                 "minimumVersion": "1.0", "supportedConnectionTypes": ["long-polling"], "version": "1.0"}]
+            return False
 
-    def _get_name_payload(self, name):
+    async def _retry_connect(self):
 
-        # Generates payload for setting our name
+        # Polls '/connect' with our existing client ID, asking the server not to hold the poll
+        # Returns True if the server accepted it
 
-        return [{"channel": "/service/controller", "clientId": self._client_id,
-                 "data": {"gameid": str(self.pin), "host": "kahoot.it",
-                          "name": str(name), "type": "login"}, "id": "14"}]
+        url = self._url + 'cometd/' + str(self.pin) + '/' + self._kahoot_session + '/connect'
 
-    def _get_disconnect_payload(self):
+        if self.advice['interval'] > 0:
 
-        # Generates payload for disconnecting from a Kahoot game
+            await asyncio.sleep(self.advice['interval'] / 1000)
 
-        return [{"channel": "/meta/disconnect", "clientId": self._client_id}]
+        val, response = await self._comet.send(url=url, data=self._get_con_payload(timeout=0))
 
-    def _get_sub_payload(self, chan, sub):
+        if not val:
 
-        # Generates payload for subscribing to a specified channel
+            return False
 
-        self._sub_id += 1
+        return await self._connect_response(response)
 
-        sub_id = str(self._sub_id)
+    async def _rehandshake(self):
 
-        return [{"channel": "/meta/" + chan, "clientId": self._client_id,
-                 "ext": {"timesync": {"l": 0, "o": -14, "tc": self._get_timecode()}}, "id": sub_id,
-                 "subscription": "/service/" + sub}]
+        # Handshakes again on our existing session token, logs in and resubscribes
+        # Returns True if we were successful
 
-    def _get_con_payload(self):
+        self._reset_client()
 
-        sub_id = str(self._sub_id)
+        try:
 
-        return [{"channel": "/meta/connect", "clientId": self._client_id, "connectionType": "long-polling",
-                 "ext": {"ack": self._get_ack_id(), "timesync": {"l": 0, "o": -14, "tc": self._get_timecode()}},
-                 "id": sub_id}]
+            await self.get_client_id()
+            await asyncio.gather(self.set_name(), self.start_session())
 
-    def _get_answer_payload(self, choice):
+        except Exception as e:
 
-        # Generates payload for answering a question
-        # 'choice' MUST be an integer and it MUST be a valid option!
+            print("Re-handshake failed: {}".format(e))
 
-        sub_id = int(self._sub_id)
+            return False
 
-        innerdata = {"choice": choice, "meta": {"lag": 13, "device": {"userAgent": "bigup_UK_grime",
-                                                                      "screen": {"width": 1920, "height": 1080}}}}
+        return True
 
-        innerdata = json.dumps(innerdata)
+    async def _rejoin(self):
 
-        return [{"channel": "/service/controller", "clientId": self._client_id,
-                 "data": {"content": innerdata, "gameid": self.pin, "host": "kahoot.it", "id": 6, "type": "message"},
-                 "id": sub_id}]
+        # Reserves a new session, and joins the game again
+        # Returns True if we were successful
 
-    def _get_two_auth_payload(self, seq):
+        self._reset_client()
 
-        # Generates two factor authentication payload
-        # 'seq' MUST be a valid Kahoot two-factor-auth sequence!
+        try:
 
-        innerdata = str(json.dumps({"sequence": seq}))
+            await self.get_session()
 
-        return [{"channel": "/service/controller", "clientId": self._client_id,
-                 "data": {"id": 50, "type": "message", "gameid": self.pin, "host": "kahoot.it",
-                          "content": innerdata}, "id": self._sub_id}]
+            if self._comet is not self._req:
 
-    async def _continuous_connect(self):
+                # Our socket belongs to the old session
 
-        # Function for fetching game packets
-        # Continuously polls kahoot for more game information
+                await self._comet.close()
 
-        while self._active_api:
+            await self.get_client_id()
+            await asyncio.gather(self.set_name(), self.start_session())
 
-            self._sub_id += 1
+        except Exception as e:
 
-            data = self._get_con_payload()
-            url = self._url + 'cometd/' + str(self.pin) + '/' + self._kahoot_session + '/connect'
+            print("Rejoin failed: {}".format(e))
 
-            val, response = await self._req.send(url=url, data=data)
+            return False
 
-            if not val:
+        return True
 
-                # Error occurred, stopping
+    def _reset_client(self):
 
-                return
+        # Forgets state tied to our old client ID
 
-            if len(response) > 0:
+        self._armed = None
+        self._server_ack = None
 
-                for i, x in enumerate(response):
+        self._acks.reset()
 
-                    if x['channel'] != '/meta/connect':
+    async def _watch_poll(self, url, data):
 
-                        #print(x)
+        """
+        Sends a '/connect' poll under a watchdog.
+
+        The poll itself times out after the server may hold it plus 'network_delay',
+        which is handled like any other failed poll.
+        The watchdog only steps in if the transport fails to time out,
+        'stall_deadline' seconds after that.
+        The poll is then aborted and a CONNECTION_ERROR(-3) event with the timing details is emitted.
+
+        :param url: URL to poll
+        :type url: str
+        :param data: Connect payload to send
+        :type data: list
+        :return: The result of the send, or (None, None) if the poll stalled
+        :rtype: tuple
+        """
 
-                        await self._queue_api.put(x)
+        expected = self.advice['timeout'] / 1000
+        timeout = self._get_poll_timeout()
+        deadline = timeout + self.stall_deadline
+        start = time.perf_counter()
 
-    async def get_session(self):
+        try:
 
-        # This function gets a session ID
+            return await asyncio.wait_for(self._comet.send(url=url, data=data, timeout=timeout), deadline)
 
-        url = self._url + "reserve/session/" + str(self.pin)
+        except asyncio.TimeoutError:
 
-        val, data = await self._req.send(url=url)
+            pass
 
-        if not val:
+        elapsed = time.perf_counter() - start
 
-            # Error occurred:
+        print("Poll stalled after {:.1f} seconds, restarting it".format(elapsed))
 
-            raise Exception("Session Grab Failed!")
+        self.metrics.count('poll_stalls')
 
-        self._raw_kahoot_session = self._req.get_headers()['x-kahoot-session-token']
+        if self._comet is not self._req:
 
-        print("Raw session: {}".format(self._raw_kahoot_session))
+            # Socket is most likely half-open, opening a new one on the next send
 
-        self._challenge = self._solve_challenge(data['challenge'])
+            await self._comet.close()
 
-        print("Challenge: {}".format(self._challenge))
+        await self._connection_error('Poll stalled', {'elapsed': elapsed * 1000, 'expected': expected * 1000,
+                                                      'timeout': timeout * 1000, 'deadline': deadline * 1000,
+                                                      'transport': self._transport})
 
-        self._kahoot_session = self._session_format()
+        return None, None
 
-        # Setting session values in URLWrap
+    async def _connection_error(self, error_info, extra):
 
-        self._req.pin = self.pin
-        self._req.kahoot_session = self._kahoot_session
+        """
+        Puts a CONNECTION_ERROR(-3) event into the event queue.
+        The content is encoded like the content of Kahoot events, so handlers can treat them the same.
 
-        return
+        :param error_info: Description of the error
+        :type error_info: str
+        :param extra: Extra information about the error
+        :type extra: dict
+        """
 
-    def _solve_challenge(self, chall):
+        await self._queue_api.put({'data': {'id': -3, 'content': codec.dumps({'errorInfo': error_info,
+                                                                             'extra': extra})}})
 
-        # Function for solving Kahoot challenge
+    async def _connection_lost(self, error_info, failure):
+
+        """
+        Reports that we stopped polling and won't receive any more events,
+        with a CONNECTION_ERROR(-3) event.
+
+        :param error_info: Why we stopped
+        :type error_info: str
+        :param failure: Details of the failed reconnect, if any
+        :type failure: dict
+        """
 
-        # Cleaning up string by removing un-wanted contents:
+        self.metrics.count('connection_lost')
 
-        chall = re.sub('[^!-~]+', ' ', chall).strip()
+        await self._connection_error(error_info, {'lost': True, 'reconnect': failure, 'advice': dict(self.advice),
+                                                  'transport': self._transport})
 
-        print("CHall: {}".format(chall))
+    def _connect_reply(self, message):
 
-        # Split up contents to get relevant bits:
+        """
+        Handles the reply to a '/connect' poll.
+        We update our clock estimates and the batch number we acknowledge,
+        and stop overlapping polls if the server tells us that we have too many.
+
+        :param message: '/meta/connect' reply
+        :type message: dict
+        :return: Server time when the reply was sent, None if unknown
+        :rtype: int
+        """
 
-        chall_list = chall.split(';')
+        self._apply_advice(message)
 
-        print("List of data: {}".format(chall_list))
+        ext = message.get('ext') or {}
+        ack = ext.get('ack')
 
-        # Getting encoded string:
+        if isinstance(ack, int) and not isinstance(ack, bool) and (self._server_ack is None or ack > self._server_ack):
 
-        chall_str = chall_list[0][chall_list[0].find("'") + len("'"):chall_list[0].rfind("'")]
+            self._server_ack = ack
 
-        print("Encoded string: {}".format(chall_str))
+        if (message.get('advice') or {}).get('multiple-clients') and self.overlap_polls:
 
-        # Getting challenge expression:
+            # Server won't hold more than one poll for us
 
-        chall_exprs = eval(chall_list[1][chall_list[1].find(" = ") + len(" = ")::])
+            print("Server does not allow overlapping polls, disabling them")
 
-        print("CHall expression: {}".format(chall_exprs))
+            self.overlap_polls = False
 
-        # Solving expression:
+        if not self.timesync.update(message):
 
-        final = ""
+            return None
 
-        for i in range(len(chall_str)):
-            # Applying pattern to the challenge expression:
+        sync = ext['timesync']
 
-            curr = chr(((((ord(chall_str[i]) * i) + chall_exprs) % 77) + 48))
-            final = final + curr
+        return sync['ts'] + sync.get('p', 0)
 
-        return final
+    def _apply_advice(self, message):
 
-    def _session_format(self):
+        """
+        Applies the CometD advice of a reply, if it has any.
+        Advice we don't understand is ignored.
 
-        # Function for formatting session
+        :param message: Reply to get the advice from
+        :type message: dict
+        """
+
+        advice = message.get('advice')
+
+        if not isinstance(advice, dict):
+
+            return
+
+        for key in ('interval', 'timeout'):
+
+            value = advice.get(key)
+
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+
+                self.advice[key] = value
+
+        if advice.get('reconnect') in ('retry', 'handshake', 'none'):
+
+            self.advice['reconnect'] = advice['reconnect']
+
+    def get_advice(self):
+
+        """
+        Gets the CometD advice we are currently following.
+
+        :return: Dictionary containing the interval and timeout in milliseconds, and the reconnect strategy
+        :rtype: dict
+        """
+
+        return dict(self.advice)
+
+    def _get_poll_timeout(self):
+
+        # Gets the seconds we wait for a poll, which is as long as the server may hold it plus network delay
+
+        return self.advice['timeout'] / 1000 + self.network_delay
+
+    def _poll_started(self):
+
+        # Keeps track of polls in flight, and how long we had none
+
+        if self._polls == 0 and self._poll_idle is not None:
+
+            self.metrics.timing('poll_gap', (time.perf_counter() - self._poll_idle) * 1000)
+
+        self._polls += 1
+
+    def _poll_finished(self):
+
+        # Keeps track of polls in flight
+
+        self._polls -= 1
+
+        if self._polls == 0:
+
+            self._poll_idle = time.perf_counter()
+
+    async def get_session(self):
+
+        # This function gets a session ID
+
+        data = await self._reserve_session()
+
+        self._decode_session(data)
+
+        return
+
+    async def _reserve_session(self):
+
+        # Reserves a session, returns the data given to us by Kahoot
+
+        url = self._url + "reserve/session/" + str(self.pin)
+
+        val, data = await self._req.send(url=url)
+
+        if not val:
+
+            # Error occurred:
+
+            raise Exception("Session Grab Failed!")
+
+        return data
+
+    def _decode_session(self, data):
+
+        # Solves the challenge, and decodes the session token we reserved
+
+        self._raw_kahoot_session = self._req.get_headers()['x-kahoot-session-token']
+
+        print("Raw session: {}".format(self._raw_kahoot_session))
+
+        self._challenge = self._solve_challenge(data['challenge'])
 
-        # Decoding the raw session bytes
+        print("Challenge: {}".format(self._challenge))
+
+        self._kahoot_session = self._session_format()
 
-        raw_session_bytes = base64.b64decode(self._raw_kahoot_session)
+        # Setting session values in URLWrap
 
-        # Encoding our challenge bytes to ASCII format
+        self._req.pin = self.pin
+        self._req.kahoot_session = self._kahoot_session
 
-        challenge_bytes = str(self._challenge).encode("ASCII")
+    def _solve_challenge(self, chall):
 
-        session_bytes = []
+        # Function for solving Kahoot challenge
 
-        for i in range(len(raw_session_bytes)):
+        return solve_challenge(chall)
 
-            # Applying operation to the raw session bytes
+    def _session_format(self):
 
-            session_bytes.append(raw_session_bytes[i] ^ challenge_bytes[i % len(challenge_bytes)])
+        # Function for formatting session
 
-        # TODO: Find better way to do this
-        return array.array('B', session_bytes).tostring().decode("ASCII")
+        return decode_session(self._raw_kahoot_session, self._challenge)
 
-    async def get_client_id(self):
+    async def get_client_id(self, data=None):
 
         # Function for getting client ID
+        # 'data' is a handshake payload we built ahead of time, leave blank to build one now
 
         url = self._url + 'cometd/' + str(self.pin) + '/' + self._kahoot_session
 
-        data = self._get_id_payload()
+        if data is None:
 
-        val, response = await self._req.send(url=url, data=data)
+            data = self._get_id_payload()
 
-        if not val:
+        else:
+
+            # Refreshing the timesync info of the prepared payload
+
+            data[0]['ext']['timesync'] = self.timesync.get_ext()
+
+        val, response = await self._comet.send(url=url, data=data)
+
+        if not val or not response or not response[0].get('successful', True) or 'clientId' not in response[0]:
             # Error occurred
 
             raise Exception("Client ID grab failed!")
 
         self._client_id = str(response[0]["clientId"])
 
+        self._apply_advice(response[0])
+
+        self.timesync.update(response[0])
+
         return
 
     async def set_name(self, name=None):
@@ -271,7 +1386,7 @@ class KahootAPI(object):
 
             name = self.name
 
-        val, response = await self._req.send(data=self._get_name_payload(name))
+        val, response = await self._send_message(self._get_name_payload(name))
 
         if not val:
             # An error occurred when attempting to set the name
@@ -287,23 +1402,32 @@ class KahootAPI(object):
         url = self._url + "cometd/" + str(self.pin) + "/" + self._client_id + "/disconnect"
         data = self._get_disconnect_payload()
 
-        await self._req.send(url=url, data=data)
+        await self._comet.send(url=url, data=data)
+
+        if self._comet is not self._req:
+
+            # Closing our websocket
+
+            await self._comet.close()
 
     async def start_session(self):
 
         # Function for starting Kahoot session
+        # The unsubscribe and all subscriptions are sent in one batch
 
         channels = ['controller', 'player', 'status']
 
-        response = await self._req.send(data=self._get_sub_payload('unsubscribe', 'controller'))
-
-        # self._first_connection()
+        payloads = [self._get_sub_payload('unsubscribe', 'controller')]
 
         # Subscribing to the necessary channels
 
         for i in channels:
 
-            val, response = await self._req.send(data=self._get_sub_payload('subscribe', i))
+            payloads.append(self._get_sub_payload('subscribe', i))
+
+        results = await asyncio.gather(*[self._send_message(payload) for payload in payloads])
+
+        for val, response in results[1:]:
 
             if not val:
 
@@ -316,7 +1440,7 @@ class KahootAPI(object):
         # Function for solving Two Factor authentication with the given sequence
         # sequence MUST be a valid Kahoot Two-Factor-Authentication sequence!
 
-        await self._req.send(data=self._get_two_auth_payload(seq))
+        await self._send_message(self._get_two_auth_payload(seq))
 
     def _start_continuous_connection(self):
 
@@ -328,28 +1452,195 @@ class KahootAPI(object):
 
     async def answer_question(self, choice):
 
-        # Sends answer to Kahoot game
+        """
+        Sends an answer to the Kahoot game.
+        If we have an armed answer, we only splice in the choice and send it right away.
+
+        Transport failures are also reported to the event queue as CONNECTION_ERROR(-3) or SERVER_ERROR(-4) events.
+
+        :param choice: Index of the option to answer with
+        :type choice: int
+        :return: True if the server accepted the answer, False otherwise
+        :rtype: bool
+        :raises ValueError: if the choice is not an integer
+        """
+
+        try:
+
+            choice = int(choice)
+
+        except (TypeError, ValueError):
+
+            raise ValueError("Invalid choice {!r}, choices MUST be integers!".format(choice))
+
+        armed = self._armed
+
+        if armed is None:
+
+            val, replies = await self._send_message(self._get_answer_payload(choice))
+
+            return self._answer_accepted(val, replies)
+
+        self._armed = None
+
+        prefix, suffix, url, keys = armed
+        data = prefix + str(choice).encode('ascii') + suffix
+
+        if self._comet is self._req:
+
+            val, response = await self._req.send(url=url, data=data, retries=0)
+
+            if val:
+
+                # Picking out our replies, and passing on any pushes that came with them
+
+                response = (await self._match_replies([keys], response))[0]
+
+            return self._answer_accepted(val, response)
+
+        val, replies = await self._comet.send(data=data, keys=keys, retries=0)
+
+        return self._answer_accepted(val, replies)
+
+    def _answer_accepted(self, val, replies):
+
+        # Determines if the server accepted our answer, reporting it if not
+        # 'val' - Boolean determining if the request was successful
+        # 'replies' - Replies to our answer
+
+        if not val:
+
+            self.metrics.count('answers_failed')
+
+            return False
+
+        rejected = [reply for reply in replies if not reply.get('successful', True)]
+
+        if rejected:
+
+            print("Answer rejected: {}".format(rejected[0].get('error')))
+
+            self.metrics.count('answers_rejected')
+
+            return False
+
+        return True
+
+    def arm_answer(self):
+
+        """
+        Prepares an answer, so that answering only has to splice in the choice and send the bytes.
+        The payload is encoded ahead of time, and a connection is warmed for it.
+        This is done automatically when a question starts.
+
+        An armed answer is used once, by the next call to 'answer_question'.
+
+        :return: True if the answer was armed, False otherwise
+        :rtype: bool
+        """
 
-        await self._req.send(data=self._get_answer_payload(choice))
+        payload = self._get_answer_payload(_ARM_SENTINEL)
+        prefix, sentinel, suffix = self._req._json_encode(payload).partition(str(_ARM_SENTINEL).encode('ascii'))
+
+        if not sentinel or str(_ARM_SENTINEL).encode('ascii') in suffix:
+
+            # Can't find exactly one placeholder, not arming
+
+            return False
+
+        url = self._url + 'cometd/' + str(self.pin) + '/' + self._kahoot_session + '/'
+        keys = [(message['channel'], str(message['id'])) for message in payload]
+
+        self._armed = (prefix, suffix, url, keys)
+
+        if self._comet is self._req:
+
+            # Warming a connection for our answer
+
+            self._warm(url)
+
+        return True
 
     async def start_async(self):
 
         """
         Starts connection to Kahoot, and starts the continuous connection.
+
+        Joining is pipelined, so everything that can overlap does:
+
+            * The handshake payload is built while the session is being reserved
+            * A spare connection is warmed while we solve the challenge and handshake
+            * Once we have a client ID, the login and all subscriptions go out in one batch,
+              alongside the first '/connect' poll
+
+        The time each phase took is stored in 'join_timings', in milliseconds.
         """
 
         print("Started")
 
         self._active_api = True
+        self.join_timings = {}
+
+        start = last = time.perf_counter()
+
+        # Reserving the session, and preparing the handshake while we wait:
+
+        reserve = asyncio.ensure_future(self._reserve_session())
 
-        await self.get_session()
-        await self.get_client_id()
-        await self.set_name()
-        await self.start_session()
+        # Letting the reservation send its request before we do anything else
+
+        await asyncio.sleep(0)
+
+        handshake = self._get_id_payload()
+        data = await reserve
+
+        last = self._mark_join('reserve', last)
+
+        # Warming a spare connection while we solve the challenge and handshake:
+
+        if self._comet is self._req:
+
+            self._warm()
+
+        self._decode_session(data)
+
+        last = self._mark_join('challenge', last)
+
+        await self.get_client_id(data=handshake)
+
+        last = self._mark_join('handshake', last)
 
         # Getting asyncio event loop and adding continuous connection:
 
-        asyncio.ensure_future(self._continuous_connect())
+        self._connect_task = asyncio.ensure_future(self._continuous_connect())
+
+        # Logging in and subscribing in one batch:
+
+        await asyncio.gather(self.set_name(), self.start_session())
+
+        self._mark_join('login', last)
+        self._mark_join('total', start)
+
+    def _warm(self, url=None):
+
+        # Warms a spare connection in the background
+        # Keeping a reference, so the task isn't garbage collected
+
+        task = asyncio.ensure_future(self._req.warm(url))
+
+        self._warm_tasks.add(task)
+        task.add_done_callback(self._warm_tasks.discard)
+
+    def _mark_join(self, phase, since):
+
+        # Records how long a join phase took, in milliseconds
+        # Returns the current time, so it can be used as the start of the next phase
+
+        now = time.perf_counter()
+
+        self.join_timings[phase] = (now - since) * 1000
+
+        return now
 
     async def stop_async(self):
 
@@ -362,10 +1653,30 @@ class KahootAPI(object):
 
         self._active_api = False
 
+        for task in (self._writer_task, self._connect_task, self._reorder_task):
+
+            # Stop collecting batches and polling, batches already being sent are left to finish
+
+            if task is not None:
+
+                task.cancel()
+
+        while not self._send_queue.empty():
+
+            # Messages that never made it into a batch won't get a reply
+
+            payload, fut = self._send_queue.get_nowait()
+
+            fut.cancel()
+
         # Disconnect from the game:
 
         await self.disconnect()
 
+        # Close our pooled connections:
+
+        self._req.close()
+
     def start(self):
 
         """
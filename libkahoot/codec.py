@@ -0,0 +1,104 @@
+import json
+
+try:
+
+    import orjson
+
+except ImportError:
+
+    orjson = None
+
+"""
+JSON encoding and decoding used throughout libkahoot.
+
+JSON is encoded and decoded for every request and every event,
+so we use orjson when it is installed, and fall back to the json module when it is not.
+Use 'set_fast' to switch between the two.
+"""
+
+FAST_AVAILABLE = orjson is not None  # Boolean determining if an accelerated JSON library is installed
+
+_fast = FAST_AVAILABLE  # Boolean determining if we are using the accelerated JSON library
+
+
+def set_fast(enabled=True):
+
+    """
+    Switches between the accelerated JSON library and the json module.
+    If the accelerated library is not installed, we keep using the json module.
+
+    :param enabled: Boolean determining if we should use the accelerated library
+    :type enabled: bool
+    :return: True if we are now using the accelerated library, False otherwise
+    :rtype: bool
+    """
+
+    global _fast
+
+    _fast = enabled and FAST_AVAILABLE
+
+    return _fast
+
+
+def is_fast():
+
+    """
+    Determines if we are using the accelerated JSON library.
+
+    :return: True if we are using the accelerated library, False otherwise
+    :rtype: bool
+    """
+
+    return _fast
+
+
+def dumps(data):
+
+    """
+    Encodes data into a JSON string.
+
+    :param data: Data to encode
+    :return: JSON string
+    :rtype: str
+    """
+
+    if _fast:
+
+        return orjson.dumps(data).decode('utf-8')
+
+    return json.dumps(data)
+
+
+def dumpb(data):
+
+    """
+    Encodes data into JSON bytes, ready to be sent over the network.
+
+    :param data: Data to encode
+    :return: UTF-8 encoded JSON
+    :rtype: bytes
+    """
+
+    if _fast:
+
+        return orjson.dumps(data)
+
+    return json.dumps(data).encode('utf-8')
+
+
+def loads(data):
+
+    """
+    Decodes a JSON string or bytes.
+    Both libraries raise a ValueError(json.JSONDecodeError) on invalid JSON.
+
+    :param data: JSON to decode
+    :type data: str, bytes
+    :return: Decoded data
+    """
+
+    if _fast:
+
+        return orjson.loads(data)
+
+    return json.loads(data)
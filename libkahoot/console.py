@@ -0,0 +1,241 @@
+import os
+import sys
+import asyncio
+import contextlib
+
+"""
+Asynchronous console input.
+Lets handlers prompt the user without freezing the event loop,
+so we keep polling Kahoot while the user types.
+"""
+
+
+class AsyncConsole(object):
+
+    """
+    Reads lines from stdin without blocking the event loop.
+
+    When the loop supports it, we watch stdin with 'loop.add_reader',
+    and only read from it when a line is wanted.
+    Otherwise(For example, on Windows, or if stdin is not a pipe or terminal),
+    lines are read in the default executor.
+
+    Only one prompt is shown at a time, other prompts wait their turn.
+    Use 'session' to keep the console for a whole sequence of prompts, such as a menu.
+    A prompt can be cancelled like any other coroutine, and no typed input is lost when it is.
+    """
+
+    def __init__(self, stream=None):
+
+        self.stream = stream  # Stream we read from, leave blank to use stdin
+        self._buffer = b''  # Bytes read from the stream that are not part of a returned line yet
+        self._waiter = None  # Future waiting for the stream to become readable
+        self._pending = None  # Future of a line being read in the executor
+        self._lock = None  # Lock ensuring only one prompt is shown at a time
+        self._owner = None  # Task holding the console for a session
+        self._use_reader = True  # Boolean determining if we can watch the stream with the loop
+
+    async def input(self, prompt=''):
+
+        """
+        Asynchronous version of 'input'.
+        Prints the prompt, and returns the next line typed, without the trailing newline.
+
+        :param prompt: Prompt to print before reading
+        :type prompt: str
+        :return: Line typed by the user
+        :rtype: str
+        :raises EOFError: If stdin is closed
+        """
+
+        async with self.session():
+
+            print(prompt, end='', flush=True)
+
+            return await self.readline()
+
+    @contextlib.asynccontextmanager
+    async def session(self):
+
+        """
+        Holds the console for the current task, until the block is exited.
+        Prompts from other tasks wait until the session is over,
+        so the output and prompts of a menu are not mixed with someone else's.
+        Prompts and sessions of the task holding the console go through right away.
+
+        Usage:
+
+            async with console.session():
+
+                print("Menu:")
+
+                choice = await ainput("Enter your option:")
+        """
+
+        task = asyncio.current_task()
+
+        if task is not None and task is self._owner:
+
+            # We already hold the console
+
+            yield self
+
+            return
+
+        if self._lock is None:
+
+            # Creating now, so it belongs to the running loop
+
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+
+            self._owner = task
+
+            try:
+
+                yield self
+
+            finally:
+
+                self._owner = None
+
+    async def readline(self):
+
+        """
+        Reads the next line, without the trailing newline.
+
+        :return: Next line
+        :rtype: str
+        :raises EOFError: If stdin is closed
+        """
+
+        stream = self.stream if self.stream is not None else sys.stdin
+
+        if self._use_reader:
+
+            try:
+
+                return await self._read_fd(stream.fileno())
+
+            except (AttributeError, ValueError, OSError, NotImplementedError):
+
+                # Can't watch this stream, reading it in the executor from now on
+
+                self._use_reader = False
+
+        return await self._read_executor(stream)
+
+    async def _read_fd(self, fd):
+
+        """
+        Reads a line from a file descriptor, waiting on the loop until it is readable.
+
+        :param fd: File descriptor to read from
+        :type fd: int
+        :return: Next line
+        :rtype: str
+        """
+
+        loop = asyncio.get_event_loop()
+
+        while b'\n' not in self._buffer:
+
+            self._waiter = loop.create_future()
+
+            # Raises an exception if the loop can't watch this file descriptor
+
+            loop.add_reader(fd, self._readable)
+
+            try:
+
+                await self._waiter
+
+            finally:
+
+                loop.remove_reader(fd)
+
+                self._waiter = None
+
+            data = os.read(fd, 4096)
+
+            if not data:
+
+                # Stream closed
+
+                if not self._buffer:
+
+                    raise EOFError("EOF when reading a line")
+
+                self._buffer += b'\n'
+
+            self._buffer += data
+
+        line, _, self._buffer = self._buffer.partition(b'\n')
+
+        return line.decode('utf-8', 'replace').rstrip('\r')
+
+    async def _read_executor(self, stream):
+
+        """
+        Reads a line from a stream in the default executor.
+
+        If we are cancelled, the read keeps going,
+        and its line is given to the next caller.
+
+        :param stream: Stream to read from
+        :return: Next line
+        :rtype: str
+        """
+
+        if self._pending is None:
+
+            self._pending = asyncio.get_event_loop().run_in_executor(None, stream.readline)
+
+        line = await asyncio.shield(self._pending)
+
+        self._pending = None
+
+        if not line:
+
+            raise EOFError("EOF when reading a line")
+
+        return line.rstrip('\r\n')
+
+    def _readable(self):
+
+        # Called by the loop when the stream becomes readable
+
+        if self._waiter is not None and not self._waiter.done():
+
+            self._waiter.set_result(None)
+
+
+console = AsyncConsole()  # Console reading from stdin, shared by everyone
+
+
+async def ainput(prompt=''):
+
+    """
+    Asynchronous version of 'input', reading from stdin.
+    See AsyncConsole.input for more information.
+
+    :param prompt: Prompt to print before reading
+    :type prompt: str
+    :return: Line typed by the user
+    :rtype: str
+    """
+
+    return await console.input(prompt)
+
+
+def session():
+
+    """
+    Holds the console reading from stdin for the current task.
+    See AsyncConsole.session for more information.
+
+    :return: Asynchronous context manager holding the console
+    """
+
+    return console.session()
@@ -1,8 +1,18 @@
+import os
 import random
-import json
+import time
+import types
 from inspect import isfunction
+from functools import partial
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 import asyncio
 
+from libkahoot import codec
+from libkahoot.console import ainput, session
+from libkahoot.metrics import Metrics
+
 """
 This file contains all of the built in Kahoot handlers,
 as well as methods to handle said handlers.
@@ -27,6 +37,121 @@ def get_place(place):
     return "th"
 
 
+@types.coroutine
+def _timed_steps(coro, blocked):
+
+    """
+    Runs a coroutine, timing each step it runs on the event loop between awaits.
+    Time spent waiting on I/O, sleeps or user input is not counted,
+    only time the coroutine holds up the loop.
+
+    :param coro: Coroutine to run
+    :param blocked: List of two floats, we add the total seconds spent in steps to the first,
+    and keep the seconds of the longest step in the second
+    :type blocked: list
+    :return: Value returned by the coroutine
+    """
+
+    value, error = None, None
+
+    while True:
+
+        start = time.perf_counter()
+
+        try:
+
+            if error is None:
+
+                yielded = coro.send(value)
+
+            else:
+
+                yielded = coro.throw(error)
+
+        except StopIteration as e:
+
+            return e.value
+
+        finally:
+
+            step = time.perf_counter() - start
+
+            blocked[0] += step
+            blocked[1] = max(blocked[1], step)
+
+        try:
+
+            value, error = (yield yielded), None
+
+        except GeneratorExit:
+
+            coro.close()
+
+            raise
+
+        except BaseException as e:
+
+            # Cancelled, passing it on to the coroutine
+
+            value, error = None, e
+
+
+class LazyContent(Mapping):
+
+    """
+    Read-only view of the content of a Kahoot event.
+
+    Kahoot sends event content as a JSON string nested inside the message.
+    We only decode it the first time it is accessed, and then keep the result,
+    so events nobody reads never pay for decoding.
+    Behaves like the decoded dictionary, and 'value' gives the decoded content itself.
+    """
+
+    __slots__ = ('raw', '_value', '_decoded')
+
+    def __init__(self, raw):
+
+        self.raw = raw  # Content as received from Kahoot, usually a JSON string
+        self._value = None  # Decoded content
+        self._decoded = False  # Boolean determining if we have decoded the content
+
+    @property
+    def value(self):
+
+        """
+        Gets the decoded content, decoding it if necessary.
+
+        :return: Decoded content
+        """
+
+        if not self._decoded:
+
+            self._value = codec.loads(self.raw) if isinstance(self.raw, (str, bytes)) else self.raw
+            self._decoded = True
+
+        return self._value
+
+    def __getitem__(self, key):
+
+        return self.value[key]
+
+    def __iter__(self):
+
+        return iter(self.value)
+
+    def __len__(self):
+
+        return len(self.value)
+
+    def __contains__(self, key):
+
+        return key in self.value
+
+    def __repr__(self):
+
+        return repr(self.value)
+
+
 class BaseKahootHandler(object):
 
     """
@@ -85,6 +210,48 @@ class NullKahootHandler(BaseKahootHandler):
         pass
 
 
+class ProcessKahootHandler(BaseKahootHandler):
+
+    """
+    Kahoot handler that does its work in another process.
+
+    Great for CPU heavy bot logic, which would otherwise hold up the event loop,
+    and with it polling and answering.
+
+    'work' is ran in the process pool of the KahootHandler with the decoded event data,
+    and what it returns is given to 'act', which is ran on the event loop.
+    'work' MUST be picklable, so pass a function defined at the top of a module,
+    or override 'work' with a staticmethod.
+    It does not have access to the Kahoot object.
+
+    By default, 'act' answers the question with the choice returned by 'work', if it is not None.
+    """
+
+    def __init__(self, id_num, work=None):
+
+        super().__init__(id_num)
+
+        if work is not None:
+
+            self.work = work  # Function ran in the process pool
+
+    @staticmethod
+    def work(data):
+
+        # Called in another process with the decoded event data,
+        # and returns the action to take
+
+        return None
+
+    async def act(self, action):
+
+        # Called on the event loop with the action returned by 'work'
+
+        if action is not None:
+
+            await self.kahoot.api.answer_question(action)
+
+
 class PrintKahootHandler(BaseKahootHandler):
 
     """
@@ -142,103 +309,105 @@ class DefaultInfoGrabFail(BaseKahootHandler):
 
         # Function for prompting for a UUID
 
-        while True:
+        async with session():
 
-            print("\n+====================================================+")
-            print("This bot requires extra quiz information to function.")
-            print("This allows the bot to prompt/automatically answer the question correctly.")
-            print("We have a few methods of acquiring this information:")
-            print("\n[1]: Manually enter quiz UUID")
-            print("   Will fetch quiz information using UUID given by user.")
-            print("   Fast and guaranteed to be accurate,")
-            print("   Given that the UUID entered is correct.")
-            print("[2]: Automatically fetch information ")
-            print("   Will use game data given to automatically search for a match.")
-            print("   Information may not be accurate, and it may take longer to locate compared to manual search.")
-            print("\n(You will be alerted if the given quiz information is incorrect)")
+            while True:
 
-            inp = int(input("\nEnter the number of your option:"))
+                print("\n+====================================================+")
+                print("This bot requires extra quiz information to function.")
+                print("This allows the bot to prompt/automatically answer the question correctly.")
+                print("We have a few methods of acquiring this information:")
+                print("\n[1]: Manually enter quiz UUID")
+                print("   Will fetch quiz information using UUID given by user.")
+                print("   Fast and guaranteed to be accurate,")
+                print("   Given that the UUID entered is correct.")
+                print("[2]: Automatically fetch information ")
+                print("   Will use game data given to automatically search for a match.")
+                print("   Information may not be accurate, and it may take longer to locate compared to manual search.")
+                print("\n(You will be alerted if the given quiz information is incorrect)")
 
-            if inp == 1:
+                inp = int(await ainput("\nEnter the number of your option:"))
 
-                # User wants to manually enter quiz UUID
+                if inp == 1:
 
-                print("\n+====================================================+")
-                print("Please enter the quiz UUID below:")
-                print("\nThe quiz UUID can be found by looking at the URL of the Kahoot game")
-                print("It should look something like this:")
-                print("\nhttps://play.kahoot.it/#/lobby?quizId=[QUIZ ID HERE]")
-                print("\nIt is important to be exact, and the UUID is case-sensitive.")
-                print("You may return to the previous menu by entering 'return' or 'r'.")
+                    # User wants to manually enter quiz UUID
 
-                uuid = str(input("Enter UUID(or 'return'):"))
+                    print("\n+====================================================+")
+                    print("Please enter the quiz UUID below:")
+                    print("\nThe quiz UUID can be found by looking at the URL of the Kahoot game")
+                    print("It should look something like this:")
+                    print("\nhttps://play.kahoot.it/#/lobby?quizId=[QUIZ ID HERE]")
+                    print("\nIt is important to be exact, and the UUID is case-sensitive.")
+                    print("You may return to the previous menu by entering 'return' or 'r'.")
 
-                if uuid.lower() == 'return':
+                    uuid = str(await ainput("Enter UUID(or 'return'):"))
 
-                    # User wants to return to the previous menu
+                    if uuid.lower() == 'return':
 
-                    continue
+                        # User wants to return to the previous menu
 
-                # Searching for UUID:
+                        continue
 
-                val = await self.kahoot.info.get_info_by_uuid(uuid)
+                    # Searching for UUID:
 
-                # We don't care about the returncode, it will be handled if it is incorrect/valid
+                    val = await self.kahoot.info.get_info_by_uuid(uuid)
 
-                return
+                    # We don't care about the returncode, it will be handled if it is incorrect/valid
 
-            if inp == 2:
+                    return
 
-                # User wants to automatically fetch information
+                if inp == 2:
 
-                print("\n+====================================================+")
-                print("When we have the necessary game data, we will automatically fetch the quiz information.")
-                print("However, please be aware this this method of fetching information may not be accurate.")
-                print("Some search parameters can be configured, such as depth, and relevant search topics.")
-                print("These values are set at the Kahoot default, "
-                      "but they can be changed to increase the chances of finding the Kahoot.")
-                print("(It is recommended for most users to keep them at their default values)")
+                    # User wants to automatically fetch information
 
-                print("\nAre you sure you want to automatically search for quiz information?")
-                print("(You may enter 'no' if you wish to return to the previous screen.")
+                    print("\n+====================================================+")
+                    print("When we have the necessary game data, we will automatically fetch the quiz information.")
+                    print("However, please be aware this this method of fetching information may not be accurate.")
+                    print("Some search parameters can be configured, such as depth, and relevant search topics.")
+                    print("These values are set at the Kahoot default, "
+                          "but they can be changed to increase the chances of finding the Kahoot.")
+                    print("(It is recommended for most users to keep them at their default values)")
 
-                inp = str(input("\n(Y/N")).lower()
+                    print("\nAre you sure you want to automatically search for quiz information?")
+                    print("(You may enter 'no' if you wish to return to the previous screen.")
 
-                if inp not in ['yes', 'y', 'ye']:
+                    inp = str(await ainput("\n(Y/N")).lower()
 
-                    # User does not want to continue
+                    if inp not in ['yes', 'y', 'ye']:
 
-                    continue
+                        # User does not want to continue
 
-                # TODO: Find a better way to configure search parameters
-                # I think some more work needs to go into the SearchParameter object, found in quiz.py
-                # We should add features that allows for the listing and iteration of these objects.
+                        continue
 
-                '''
-                print("\nWould you like configure these search parameters?")
-                print("(Yes to configure, No to keep defaults)")
+                    # TODO: Find a better way to configure search parameters
+                    # I think some more work needs to go into the SearchParameter object, found in quiz.py
+                    # We should add features that allows for the listing and iteration of these objects.
 
-                inp = str(input("\n(Y/N):")).lower()
+                    '''
+                    print("\nWould you like configure these search parameters?")
+                    print("(Yes to configure, No to keep defaults)")
 
-                if inp in ['yes', 'y', 'ye']:
+                    inp = str(await ainput("\n(Y/N):")).lower()
 
-                    # User wants to configure search parameters
+                    if inp in ['yes', 'y', 'ye']:
 
-                    val = await self._configure_search_params()
+                        # User wants to configure search parameters
 
-                    if not val:
+                        val = await self._configure_search_params()
 
-                        # User wants to return
+                        if not val:
 
-                        continue
-                '''
+                            # User wants to return
+
+                            continue
+                    '''
 
-                print("\nConfiguration complete.")
-                print("Automatically fetching quiz information when game data is available.\n")
+                    print("\nConfiguration complete.")
+                    print("Automatically fetching quiz information when game data is available.\n")
 
-                self.kahoot._auto_fetch_info = True
+                    self.kahoot._auto_fetch_info = True
 
-                return
+                    return
 
     # TODO: Fix this function!
     # This function is terribly designed and is poorly optimised.
@@ -285,7 +454,7 @@ class DefaultInfoGrabFail(BaseKahootHandler):
                 print("(You can also enter 'd' to accept the default value)")
                 print("You can also enter 'none' or 'n' to set the value to blank)")
 
-                orde = input("Enter number of your choice:")
+                orde = await ainput("Enter number of your choice:")
 
                 # Making sure their are no errors while recovering value
 
@@ -370,7 +539,7 @@ class DefaultInfoGrabFail(BaseKahootHandler):
                 print("(You may enter 'd' to accept the default value(s))")
                 print("(You may also enter 'none' or 'n' to set the value to blank)")
 
-                top = input("Enter the number(s) of your options(s):")
+                top = await ainput("Enter the number(s) of your options(s):")
 
                 try:
 
@@ -451,7 +620,7 @@ class DefaultInfoGrabFail(BaseKahootHandler):
                 print("(You may enter 'd' to accept the default value(s))")
                 print("(You may also enter 'none' or 'n' to set the value to blank)")
 
-                grad = input("Enter the number(s) of your options(s):")
+                grad = await ainput("Enter the number(s) of your options(s):")
 
                 try:
 
@@ -531,7 +700,7 @@ class DefaultInfoGrabFail(BaseKahootHandler):
                 print("(You may leave the prompt blank to accept the currently selected value(s))")
                 print("(You may enter 'd' to accept the default value(s))")
 
-                usag = input("Enter the number(s) of your options(s):")
+                usag = await ainput("Enter the number(s) of your options(s):")
 
                 try:
 
@@ -594,7 +763,7 @@ class DefaultInfoGrabFail(BaseKahootHandler):
 
                 try:
 
-                    dee = int(input("\nEnter Depth Value Here:"))
+                    dee = int(await ainput("\nEnter Depth Value Here:"))
 
                     if dee < 1:
 
@@ -632,7 +801,7 @@ class DefaultInfoGrabFail(BaseKahootHandler):
             print("And you will be returned to the previous screen.")
             print("(It is definitely NOT recommended to alter these variables.")
 
-            inp = input("Keep parameters(Y/N)?:").lower()
+            inp = (await ainput("Keep parameters(Y/N)?:")).lower()
 
             if inp in ['y', 'yes', 'ye']:
 
@@ -695,9 +864,11 @@ class DefaultAnswerQuestion(BaseKahootHandler):
         Prompts players for the answer type they wish to use.
         """
 
-        while True:
+        async with session():
 
-            print('''Su pports the following answering options:\n
+            while True:
+
+                print('''Su pports the following answering options:\n
             1. User Answer - User manually inputs the answer
             2. Auto-Answer Correct - Computer automatically answers question correctly
             (Requires fetching of Kahoot answers)
@@ -705,41 +876,41 @@ class DefaultAnswerQuestion(BaseKahootHandler):
             4. AutoAnswer - Hybrid - Computer randomly decides weather to answer correctly or not based on user value
             (Requires fetching of Kahoot answers)''')
 
-            inp = int(input("Please answer the number of the answer type you wish to use:"))
+                inp = int(await ainput("Please answer the number of the answer type you wish to use:"))
 
-            if inp not in [1, 2, 3, 4]:
+                if inp not in [1, 2, 3, 4]:
 
-                # Incorrect answer! Retry...
+                    # Incorrect answer! Retry...
 
-                print("Invalid answer type detected!")
+                    print("Invalid answer type detected!")
 
-                continue
+                    continue
 
-            self.ans_type = inp
+                self.ans_type = inp
 
-            if inp == 4:
+                if inp == 4:
 
-                # Prompt for random value
+                    # Prompt for random value
 
-                print("Please enter the probability of answering correctly.")
-                print("For example, if you want the computer to answer correctly 45% of the time,\n"
-                      "then enter '40' as your value.")
+                    print("Please enter the probability of answering correctly.")
+                    print("For example, if you want the computer to answer correctly 45% of the time,\n"
+                          "then enter '40' as your value.")
 
-                inp = int(input("Enter probability:"))
+                    inp = int(await ainput("Enter probability:"))
 
-                if 100 < inp < 0:
+                    if 100 < inp < 0:
 
-                    # Invalid probability entered!
+                        # Invalid probability entered!
 
-                    print("Invalid probability entered!")
+                        print("Invalid probability entered!")
 
-                    continue
+                        continue
 
-                # Set the probability value:
+                    # Set the probability value:
 
-                self.per = inp
+                    self.per = inp
 
-            break
+                break
 
     async def hand(self, data):
 
@@ -779,6 +950,12 @@ class DefaultAnswerQuestion(BaseKahootHandler):
 
             ans = await self._auto_hybrid(options, question_num)
 
+        if ans is None:
+
+            # No answer to give
+
+            return
+
         print("\n+=-=-=-=-=-=-=-=-=-=-=-=-+")
         print("Selecting Answer: {}".format(ans))
         print("+=-=-=-=-=-=-=-=-=-=-=-=-+")
@@ -801,7 +978,9 @@ class DefaultAnswerQuestion(BaseKahootHandler):
                                        int(option) + 1))
 
             print("\nYou may answer using the number, or the first character of the color of your option.")
-            answer = input("\nEnter your answer:").lower()
+            # KahootHandler cancels us if the question is over before the user answers
+
+            answer = (await ainput("\nEnter your answer:")).lower()
 
             for num, val in enumerate(self.kahoot.info.answer_dict):
 
@@ -1204,7 +1383,11 @@ class DefaultTwoFactorCodeNecessary(BaseKahootHandler):
 
             return
 
-        code = await self._two_factor()
+        async with session():
+
+            # Keeping the console until we have a code, so other prompts don't interrupt us
+
+            code = await self._two_factor()
 
         if code is None:
 
@@ -1236,7 +1419,7 @@ class DefaultTwoFactorCodeNecessary(BaseKahootHandler):
             print("\nFor example:\n\nIf the pattern is Green-Red-Blue-Yellow,\nYou would enter: grby")
             print("You can also skip the Two-Factor authentication by entering 'skip', or just 's'")
 
-            inp = str(input("\nEnter letters: ").lower())
+            inp = str(await ainput("\nEnter letters: ")).lower()
 
             if inp in ["skip", "s"]:
 
@@ -1286,7 +1469,7 @@ class DefaultTwoFactorCodeNecessary(BaseKahootHandler):
         print("As Kahoot will not allow the host to start until a user has properly authenticated"
               "(This should not be a problem unless you are playing alone).")
 
-        conf = str(input("\nAre you sure you want to skip(Y/N)?:")).lower()
+        conf = str(await ainput("\nAre you sure you want to skip(Y/N)?:")).lower()
 
         if conf in ["y", "yes", "ye"]:
 
@@ -1322,15 +1505,171 @@ DEFAULT_HANDLERS = {-2: DefaultInfoGrabFail(-2),
                     53: DefaultTwoFactorCodeNecessary(53)}
 
 
+class EventQueue(asyncio.Queue):
+
+    """
+    Event queue that hands out time critical events first.
+
+    Each event ID has a priority, lower numbers are handed out first,
+    and events with the same priority are handed out in the order they were added.
+    ID's without a priority get 'DEFAULT_PRIORITY'.
+
+    So low priority events are not stuck behind a steady stream of important ones,
+    an event that has waited longer than 'starve_after' seconds is handed out next, no matter its priority.
+
+    Works like any other asyncio queue, so 'put', 'get', 'qsize' and 'join' behave as usual.
+    """
+
+    DEFAULT_PRIORITY = 1  # Priority of ID's that have not been given one
+
+    def __init__(self, maxsize=0, priorities=None, starve_after=1.0):
+
+        if priorities is None:
+
+            # Questions first, end of question and quiz results last
+
+            priorities = {1: 0, 2: 0, 3: 2, 8: 2, 13: 2}
+
+        self.priorities = priorities  # Dictionary mapping ID's to priorities
+        self.starve_after = starve_after  # Seconds an event may wait before it is handed out regardless of priority
+        self.last_wait = 0  # Seconds the last event handed out waited in the queue
+
+        super().__init__(maxsize=maxsize)
+
+    def qsize(self):
+
+        return self._size
+
+    def empty(self):
+
+        return not self._size
+
+    def _init(self, maxsize):
+
+        self._queue = {}  # Dictionary mapping priorities to events waiting at that priority
+        self._order = []  # Sorted list of priorities we have seen
+        self._size = 0  # Number of events in the queue
+
+    def _put(self, item):
+
+        try:
+
+            priority = self.priorities.get(item['data']['id'], self.DEFAULT_PRIORITY)
+
+        except (KeyError, TypeError):
+
+            # Not a Kahoot event, giving it the default priority
+
+            priority = self.DEFAULT_PRIORITY
+
+        lane = self._queue.get(priority)
+
+        if lane is None:
+
+            lane = self._queue[priority] = deque()
+
+            self._order.append(priority)
+            self._order.sort()
+
+        lane.append((time.perf_counter(), item))
+
+        self._size += 1
+
+    def _get(self):
+
+        chosen = None
+        now = time.perf_counter()
+
+        for priority in self._order:
+
+            lane = self._queue[priority]
+
+            if not lane:
+
+                continue
+
+            if chosen is None:
+
+                # Most important event waiting
+
+                chosen = lane
+
+            elif now - lane[0][0] > self.starve_after and lane[0][0] < chosen[0][0]:
+
+                # Less important event has waited too long
+
+                chosen = lane
+
+        self._size -= 1
+
+        added, item = chosen.popleft()
+
+        self.last_wait = now - added
+
+        return item
+
+
 class KahootHandler(object):
 
-    def __init__(self, queue, kahoot):
+    """
+    Pulls events from the event queue and gives them to the registered handlers.
+
+    Handlers are registered straight away, either with 'add_handler' or the 'on' decorator.
+    Their 'start' methods are all ran together once we are started,
+    and the time each one took is kept in 'startup_times'.
+
+    Each ID can have many handlers, which are given events in order of priority(Lowest first).
+    When an event arrives, its handlers are called one after another, from a precomputed tuple.
+
+    Handlers run as tasks, so a slow handler does not hold up other events.
+    Each ID has its own lane: events with the same ID are handled one at a time, in order,
+    while events with different ID's are handled concurrently.
+    At most 'max_in_flight' events are being handled at once,
+    after that events wait in their lanes until a handler finishes.
+    We keep pulling events from the queue, so a slow lane never holds up the other ID's.
+
+    We time how long each event waits before a handler gets it, how long each handler takes,
+    and how long each handler holds up the event loop, per handler and per ID(See 'profile').
+    If a handler holds up the loop for longer than 'slow_threshold' milliseconds without awaiting,
+    a SLOW_HANDLER(-5) event is sent.
+
+    ProcessKahootHandlers do their work in a process pool with 'workers' processes(Defaults to the number of CPUs),
+    which is started with the handlers. Use 'set_pool' to give us a pool of your own.
+
+    Handlers of question events('question_ids') run in the scope of their question.
+    When a question is over(QUESTION_OVER, or the next START_QUESTION),
+    or its time limit plus 'deadline_grace' seconds has passed,
+    handlers still working on it are cancelled.
+    """
+
+    def __init__(self, queue, kahoot, max_in_flight=32, slow_threshold=100, deadline_grace=1, workers=None):
 
         self.kahoot = kahoot  # Kahoot Masterclass to give to all handlers
         self._queue_handler = queue  # Queue instance that contains all requests
-        self.handlers = {}  # Dictionary of registered Kahoot handlers
+        self.handlers = {}  # Dictionary mapping ID's to lists of registered Kahoot handlers, in order of priority
+        self._table = {}  # Dictionary mapping ID's to tuples of (callable, handler, name) to call on each event
         self._active_handler = False  # Boolean value determining if we are active
-        self._thread_handler = None  # Threading instance of our handler consumer
+        self.max_in_flight = max_in_flight  # Maximum number of events being handled at once
+        self.metrics = Metrics()  # Timings of our handlers
+        self.slow_threshold = slow_threshold  # Milliseconds a handler may block the loop before we warn, None to never
+        self.id_metrics = {}  # Dictionary mapping ID's to the timings of their events
+        self.handler_metrics = {}  # Dictionary mapping handler names to the timings of their calls
+        self.question_ids = (1, 2)  # ID's of events whose handlers are cancelled when their question is over
+        self.deadline_grace = deadline_grace  # Seconds handlers may run past the question time limit
+        self.deadline = None  # Loop time when the current question is over, None if unknown
+        self._question = None  # Index of the current question
+        self._scopes = {}  # Dictionary mapping question indexes to the handler tasks working on them
+        self._deadline_timer = None  # Timer ending the current question once its time limit has passed
+        self.workers = workers  # Number of processes in our process pool, None for the number of CPUs
+        self._pool = None  # Process pool ProcessKahootHandlers do their work in
+        self._own_pool = False  # Boolean determining if we created the process pool, and should shut it down
+        self._in_flight = None  # Semaphore limiting the number of events being handled at once
+        self._consumer = None  # Task pulling events from the queue
+        self._lanes = {}  # Dictionary mapping ID's to events waiting to be handled
+        self._lane_tasks = {}  # Dictionary mapping ID's to the task working through their lane
+        self.startup_times = {}  # Dictionary mapping started handlers to the milliseconds their 'start' took
+        self._startup = None  # Task starting the registered handlers
+        self._start_tasks = set()  # Tasks starting handlers registered after we started
         self.id_map = {"START_QUESTION": 1,
                        "ANSWER_QUESTION": 2,
                        "GAME_OVER": 3,
@@ -1348,11 +1687,104 @@ class KahootHandler(object):
                        "INVALID_NAME": -1,
                        "INFO_GRAB_FAIL": -2,
                        "CONNECTION_ERROR": -3,
-                       "SERVER_ERROR": -4}  # Dictionary mapping events to numerical ID's
+                       "SERVER_ERROR": -4,
+                       "SLOW_HANDLER": -5}  # Dictionary mapping events to numerical ID's
 
         self._init_handlers()
 
-    def add_handler(self, hand, id_num, args=None):
+    def set_priority(self, id_num, priority):
+
+        """
+        Sets the priority of events with the given ID.
+        Lower numbers are handed out first, see EventQueue for more information.
+        Only has an effect if our queue is an EventQueue.
+
+        :param str, int id_num: ID to set the priority of, can be a valid string or integer
+        :param priority: Priority of the events
+        :type priority: int
+        """
+
+        id_num = self._resolve_id(id_num)
+
+        if isinstance(self._queue_handler, EventQueue):
+
+            self._queue_handler.priorities[id_num] = priority
+
+    def get_priority(self, id_num):
+
+        """
+        Gets the priority of events with the given ID.
+
+        :param str, int id_num: ID to get the priority of, can be a valid string or integer
+        :return: Priority of the events, None if our queue does not use priorities
+        :rtype: int
+        """
+
+        id_num = self._resolve_id(id_num)
+
+        if isinstance(self._queue_handler, EventQueue):
+
+            return self._queue_handler.priorities.get(id_num, EventQueue.DEFAULT_PRIORITY)
+
+        return None
+
+    def set_pool(self, pool):
+
+        """
+        Sets the pool ProcessKahootHandlers do their work in.
+        We will not shut down pools given to us.
+
+        :param pool: Pool to use
+        :type pool: concurrent.futures.Executor
+        """
+
+        self._pool = pool
+        self._own_pool = False
+
+    def _get_pool(self):
+
+        """
+        Gets the pool ProcessKahootHandlers do their work in, creating it if necessary.
+
+        :return: Process pool
+        :rtype: concurrent.futures.Executor
+        """
+
+        if self._pool is None:
+
+            self._pool = ProcessPoolExecutor(max_workers=self.workers or os.cpu_count() or 1)
+            self._own_pool = True
+
+        return self._pool
+
+    async def _warm_pool(self):
+
+        """
+        Starts the processes of our pool, so the first event doesn't wait for them.
+        """
+
+        loop = asyncio.get_event_loop()
+        pool = self._get_pool()
+
+        await asyncio.gather(*[loop.run_in_executor(pool, int) for _ in range(self.workers or os.cpu_count() or 1)])
+
+    async def _run_in_pool(self, hand, game_data):
+
+        """
+        Gives the decoded event data to the 'work' of a ProcessKahootHandler in our process pool,
+        and then gives what it returns to the 'act' of the handler.
+
+        :param hand: Handler to run
+        :type hand: ProcessKahootHandler
+        :param game_data: Content of the event
+        :type game_data: LazyContent
+        """
+
+        action = await asyncio.get_event_loop().run_in_executor(self._get_pool(), hand.work, game_data.value)
+
+        await hand.act(action)
+
+    def add_handler(self, hand, id_num, args=None, priority=0):
 
         """
         Registers a Kahoot handler to the given ID.
@@ -1360,15 +1792,53 @@ class KahootHandler(object):
         If the handler to add is a class, it MUST inherit BaseKahootHandler,
         or else it will be ignored.
 
-        We overwrite the handler registered at this position.
+        The handler is added alongside any handlers already registered at this position,
+        and replaces the placeholder handler registered by default.
 
         :param hand: Handler instance to add
         :param int, str id_num: ID number to register the handler to. Can be a valid string or integer.
         :param args:
+        :param priority: Handlers with lower priorities are given events first
+        :type priority: int
         :return:
         """
 
-        asyncio.ensure_future(self._add_handler(hand, id_num, args=None))
+        self._register(hand, id_num, priority=priority)
+
+        if self._startup is not None and hand not in self.startup_times and isinstance(hand, BaseKahootHandler):
+
+            # Already started, starting this handler now
+
+            task = asyncio.ensure_future(self._start_handlers([hand]))
+
+            self._start_tasks.add(task)
+            task.add_done_callback(self._start_tasks.discard)
+
+    def on(self, id_num, priority=0):
+
+        """
+        Decorator that registers a function as a Kahoot handler.
+
+        .. code-block:: python
+
+            @kah.handlers.on('START_QUESTION')
+            async def question(data, kahoot_instance=None):
+
+                print(data)
+
+        :param int, str id_num: ID number to register the handler to. Can be a valid string or integer.
+        :param priority: Handlers with lower priorities are given events first
+        :type priority: int
+        :return: Decorator that registers the function, and returns it unchanged
+        """
+
+        def decorator(func):
+
+            self.add_handler(func, id_num, priority=priority)
+
+            return func
+
+        return decorator
 
     def add_handlers(self, hands):
 
@@ -1389,15 +1859,18 @@ class KahootHandler(object):
 
             self.add_handler(hands[id_num], id_num)
 
-    async def _add_handler(self, hand, id_num, args=None):
+    def _register(self, hand, id_num, args=None, priority=0, placeholder=False):
 
         """
-        Low-Level asynchronous method for adding handlers.
+        Registers a handler, without starting it.
 
         :param hand: Handler instance to add
         :param id_num: Number to register handler to
         :param args: Arguments to pass to handler
-        :return:
+        :param priority: Handlers with lower priorities are given events first
+        :type priority: int
+        :param placeholder: Boolean determining if the handler is replaced once a handler is added
+        :type placeholder: bool
         """
 
         if args is None:
@@ -1414,7 +1887,7 @@ class KahootHandler(object):
 
             # Given a function to work with
 
-            self._make_hand_entry(id_num, 1, hand)
+            self._make_hand_entry(id_num, 1, hand, priority=priority, placeholder=placeholder)
 
             return
 
@@ -1422,20 +1895,16 @@ class KahootHandler(object):
 
         elif isinstance(hand, BaseKahootHandler):
 
-            # Is a class inheriting BaseKahootHandler
+            # Is a class inheriting BaseKahootHandler, ProcessKahootHandlers do their work in our process pool
+
+            hand_type = 2 if isinstance(hand, ProcessKahootHandler) else 0
 
-            self._make_hand_entry(id_num, 0, hand)
+            self._make_hand_entry(id_num, hand_type, hand, priority=priority, placeholder=placeholder)
 
             # Binding information to handler:
 
             hand.bind(inst=self.kahoot)
 
-            # Starting handler
-
-            print("Starting handler : {}".format(hand))
-
-            await hand.start()
-
             return
 
         else:
@@ -1444,53 +1913,137 @@ class KahootHandler(object):
 
             raise Exception("Invalid Handler Type(Accepts methods and classes inheriting BaseKahootHandler)")
 
-    async def remove_handler(self, id_num, stop=True):
+    async def remove_handler(self, id_num, stop=True, hand=None):
 
         """
-        Removes the handler at the given ID
-        and replaces it with 'NullKahootHandler'.
+        Removes a handler at the given ID, or all of them if no handler is given.
+        If no handlers are left, the ID is given a 'NullKahootHandler'.
 
-        If any errors occur during the stop process, we replace the handler and raise them,
+        If any errors occur during the stop process, we remove the handler and raise them,
         ensuring that our handler environment doesn't get incomplete.
 
         :param str, int id_num: ID of the handler to remove, can be valid string or integer
         :param stop: Weather we should call the 'stop' method of the handler, if applicable
         :type stop: bool
+        :param hand: Handler to remove, leave blank to remove every handler at the ID
+        :raises ValueError: if the handler is not registered at the ID
         """
 
         # Figure out what we are working with:
 
         id_num = self._resolve_id(id_num)
 
-        # Ensure that we eventually replace the handler no matter what
+        entries = self.handlers.get(id_num, [])
+
+        if hand is None:
+
+            removed = list(entries)
+
+        else:
+
+            removed = [entry for entry in entries if entry['inst'] is hand]
+
+            if not removed:
+
+                raise ValueError("Handler {} is not registered to ID {}".format(hand, id_num))
+
+        # Ensure that we eventually remove the handlers no matter what
 
         try:
 
-            # Check if we should stop the handler
+            # Check if we should stop the handlers
 
             if stop:
 
-                # Stop the handler
+                # Stop the handlers
+
+                for entry in removed:
 
-                await self._stop_handler(id_num)
+                    await self._stop_entry(entry)
 
         finally:
 
-            # Make a new entry at that position.
+            self.handlers[id_num] = [entry for entry in entries if entry not in removed]
+
+            if not self.handlers[id_num]:
+
+                # Make a new entry at that position.
 
-            self._make_hand_entry(id_num, 0, NullKahootHandler(id_num))
+                self._make_hand_entry(id_num, 0, NullKahootHandler(id_num), placeholder=True)
+
+            self._build_table(id_num)
 
     def start(self):
 
         """
         Starts the Kahoot handler.
-        This schedules the handler consumer as an asyncio task,
-        meaning that handlers will start to receive their relevant information.
+        This starts every registered handler at once,
+        and schedules the handler consumer as an asyncio task,
+        meaning that handlers will start to receive their relevant information once they are all started.
         """
 
         self._active_handler = True
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+
+        self._startup = asyncio.ensure_future(self._start_handlers())
+        self._consumer = asyncio.ensure_future(self._handle())
+
+    async def _start_handlers(self, hands=None):
+
+        """
+        Runs the 'start' method of the given handlers at the same time,
+        and records how long each one took in 'startup_times'.
+        Handlers that prompt the user should do so in a console session,
+        so their prompts are not mixed with the prompts of other handlers.
+        Handlers that are already started are ignored.
+
+        :param hands: Handlers to start, leave blank to start every registered handler
+        :type hands: list
+        """
+
+        if hands is None:
+
+            hands = [entry['inst'] for entries in self.handlers.values() for entry in entries if entry['type'] != 1]
+
+        # Removing duplicates and started handlers, while keeping the order:
+
+        hands = [hand for hand in dict.fromkeys(hands) if hand not in self.startup_times]
+
+        starting = []
 
-        asyncio.ensure_future(self._handle())
+        if self._pool is None and any(isinstance(hand, ProcessKahootHandler) for hand in hands):
+
+            # Starting our process pool with the handlers that need it
+
+            starting.append(self._warm_pool())
+
+        for hand in hands:
+
+            # Marking as started, so nobody starts it twice
+
+            self.startup_times[hand] = None
+
+        async def timed(hand):
+
+            start = time.perf_counter()
+
+            try:
+
+                await hand.start()
+
+            except Exception as e:
+
+                print("Exception occurred while starting handler: {}".format(hand))
+
+                print("Exception info: {}".format(e))
+
+            self.startup_times[hand] = (time.perf_counter() - start) * 1000
+
+            if not isinstance(hand, (NullKahootHandler, PrintKahootHandler)):
+
+                print("Started handler : {} in {:.2f} ms".format(hand, self.startup_times[hand]))
+
+        await asyncio.gather(*starting, *[timed(hand) for hand in hands])
 
     def stop(self):
 
@@ -1500,7 +2053,24 @@ class KahootHandler(object):
         """
 
         self._active_handler = False
-        self._thread_handler.join()
+
+        if self._consumer is not None:
+
+            self._consumer.cancel()
+
+        for task in self._lane_tasks.values():
+
+            task.cancel()
+
+        if self._deadline_timer is not None:
+
+            self._deadline_timer.cancel()
+
+        if self._own_pool:
+
+            self._pool.shutdown(wait=False)
+
+            self._pool = None
 
         for id_num in self.handlers:
 
@@ -1515,20 +2085,24 @@ class KahootHandler(object):
         This function should be ran as an asynchronous task.
         """
 
+        # Waiting for our handlers to start:
+
+        await self._startup
+
         while self._active_handler:
 
             # Getting value from queue:
 
             data = await self._queue_handler.get()
+            waited = getattr(self._queue_handler, 'last_wait', 0)
 
             id_num = data['data']['id']
-            game_data = json.loads(data['data']['content'])
 
             # Searching through handlers and using them to handle data
 
             try:
 
-                hand = self.handlers[id_num]
+                table = self._table[id_num]
 
             except:
 
@@ -1536,37 +2110,375 @@ class KahootHandler(object):
 
                 raise Exception("Handler for ID {} not found".format(id_num))
 
-            # Checking handler type:
+            # Content is decoded when a handler first reads it:
 
-            if hand['type'] == 0:
+            game_data = LazyContent(data['data']['content'])
 
-                # Handler is KahootHandler class
+            if id_num in (1, 2, 4):
 
-                try:
+                # Question is starting or ending
 
-                    await hand['inst'].hand(game_data)
+                self._question_event(id_num, game_data)
 
-                except Exception as e:
+            if not table:
 
-                    print("Exception occurred on handler: {} using ID: {}".format(hand['inst'], id_num))
+                # Nobody cares about this event, not even decoding it
 
-                    print("Exception info: {}".format(e))
+                continue
 
-            if hand['type'] == 1:
+            # Counting the time the event spent in the queue as waiting:
 
-                # Handler is method
+            self._dispatch(id_num, game_data, time.perf_counter() - waited)
 
-                try:
+    def _dispatch(self, id_num, game_data, queued):
+
+        """
+        Adds an event to the lane of its ID,
+        and starts working through the lane if nobody is.
+
+        :param id_num: ID of the event
+        :type id_num: int
+        :param game_data: Content of the event
+        :type game_data: LazyContent
+        :param queued: Time the event was queued, from time.perf_counter()
+        :type queued: float
+        """
+
+        lane = self._lanes.get(id_num)
+
+        if lane is None:
 
-                    inst = hand['inst']
+            lane = self._lanes[id_num] = deque()
 
-                    await inst(game_data, kahoot_instance=self.kahoot)
+        lane.append((game_data, queued))
 
-                except Exception as e:
+        if id_num not in self._lane_tasks:
 
-                    print("Exception occurred on handler: {} using ID: {}".format(hand['inst'], id_num))
+            # Keeping a reference, so the task isn't garbage collected
 
-                    print("Exception info: {}".format(e))
+            self._lane_tasks[id_num] = asyncio.ensure_future(self._run_lane(id_num))
+
+    async def _run_lane(self, id_num):
+
+        """
+        Gives the events in the lane of an ID to its handler, one at a time.
+        Each event waits until we are allowed another event in flight.
+        Stops once the lane is empty.
+
+        :param id_num: ID of the lane to work through
+        :type id_num: int
+        """
+
+        lane = self._lanes[id_num]
+
+        try:
+
+            while lane:
+
+                game_data, queued = lane.popleft()
+
+                async with self._in_flight:
+
+                    # Time spent waiting in the lane and for the semaphore counts as waiting too
+
+                    self.metrics.timing('queue_wait', (time.perf_counter() - queued) * 1000)
+
+                    if id_num in self.question_ids:
+
+                        await self._call_scoped(id_num, game_data, queued)
+
+                    else:
+
+                        await self._call_handler(id_num, game_data, queued)
+
+        finally:
+
+            del self._lane_tasks[id_num]
+
+    async def _call_scoped(self, id_num, game_data, queued):
+
+        """
+        Gives an event to its handlers in a task belonging to the scope of its question,
+        so it can be cancelled once the question is over.
+
+        :param id_num: ID of the event
+        :type id_num: int
+        :param game_data: Content of the event
+        :type game_data: LazyContent
+        :param queued: Time the event was queued, from time.perf_counter()
+        :type queued: float
+        """
+
+        index = self._get_question_index(game_data)
+
+        if index is None:
+
+            index = self._question
+
+        task = asyncio.ensure_future(self._call_handler(id_num, game_data, queued))
+        scope = self._scopes.get(index)
+
+        if scope is None:
+
+            scope = self._scopes[index] = set()
+
+        scope.add(task)
+
+        try:
+
+            # Waiting without raising if the task is cancelled
+
+            await asyncio.wait([task])
+
+        except asyncio.CancelledError:
+
+            # We are being stopped
+
+            task.cancel()
+
+            raise
+
+        finally:
+
+            scope.discard(task)
+
+            if not scope and self._scopes.get(index) is scope:
+
+                del self._scopes[index]
+
+        if task.cancelled():
+
+            self.metrics.count('question_cancelled')
+
+    def _question_event(self, id_num, game_data):
+
+        """
+        Keeps track of the question we are on.
+
+        START_QUESTION(1) starts the scope of a new question, ending the others.
+        ANSWER_QUESTION(2) sets the deadline of the question from its time limit.
+        QUESTION_OVER(4) ends the scope of its question.
+
+        :param id_num: ID of the event
+        :type id_num: int
+        :param game_data: Content of the event
+        :type game_data: LazyContent
+        """
+
+        index = self._get_question_index(game_data)
+
+        if id_num == 1:
+
+            for old in list(self._scopes):
+
+                if old != index:
+
+                    self._end_question(old)
+
+            self._question = index
+
+            return
+
+        if id_num == 4:
+
+            self._end_question(self._question if index is None else index)
+
+            return
+
+        # Question is accepting answers, working out when it is over:
+
+        try:
+
+            limit = game_data.get('timeAvailable', game_data.get('timeLeft'))
+
+        except (ValueError, TypeError, AttributeError):
+
+            limit = None
+
+        if limit is None:
+
+            return
+
+        if index is not None:
+
+            self._question = index
+
+        loop = asyncio.get_event_loop()
+
+        if self._deadline_timer is not None:
+
+            self._deadline_timer.cancel()
+
+        self.deadline = loop.time() + limit / 1000
+        self._deadline_timer = loop.call_at(self.deadline + self.deadline_grace, self._end_question, self._question)
+
+    def _end_question(self, index):
+
+        """
+        Ends the scope of a question, cancelling every handler task still working on it.
+
+        :param index: Index of the question to end
+        :type index: int
+        """
+
+        for task in self._scopes.pop(index, ()):
+
+            task.cancel()
+
+        if index == self._question:
+
+            self.deadline = None
+
+            if self._deadline_timer is not None:
+
+                self._deadline_timer.cancel()
+
+                self._deadline_timer = None
+
+    def time_left(self):
+
+        """
+        Gets the number of seconds left to answer the current question.
+
+        :return: Seconds left, None if we don't know the time limit
+        :rtype: float
+        """
+
+        if self.deadline is None:
+
+            return None
+
+        return max(0, self.deadline - asyncio.get_event_loop().time())
+
+    @staticmethod
+    def _get_question_index(game_data):
+
+        """
+        Gets the index of the question an event is about.
+
+        :param game_data: Content of the event
+        :type game_data: LazyContent
+        :return: Index of the question, None if the event doesn't say
+        :rtype: int
+        """
+
+        try:
+
+            index = game_data.get('questionIndex', game_data.get('questionNumber'))
+
+        except (ValueError, TypeError, AttributeError):
+
+            # Content isn't a JSON object
+
+            return None
+
+        return None if index is None else int(index)
+
+    async def _call_handler(self, id_num, game_data, queued):
+
+        """
+        Gives an event to the handlers registered to its ID, in order of priority.
+        Exceptions raised by a handler are printed, and not raised.
+
+        :param id_num: ID of the event
+        :type id_num: int
+        :param game_data: Content of the event
+        :type game_data: LazyContent
+        :param queued: Time the event was queued, from time.perf_counter()
+        :type queued: float
+        """
+
+        id_stats = self.id_metrics.get(id_num)
+
+        if id_stats is None:
+
+            id_stats = self.id_metrics[id_num] = Metrics()
+
+        id_stats.timing('queue_wait', (time.perf_counter() - queued) * 1000)
+
+        # Getting the handlers now, in case they were changed while the event waited
+
+        for call, inst, name in self._table[id_num]:
+
+            start = time.perf_counter()
+            blocked = [0, 0]
+
+            try:
+
+                await _timed_steps(call(game_data), blocked)
+
+            except asyncio.CancelledError:
+
+                # Question is over, or we are being stopped
+
+                raise
+
+            except Exception as e:
+
+                print("Exception occurred on handler: {} using ID: {}".format(inst, id_num))
+
+                print("Exception info: {}".format(e))
+
+            end = time.perf_counter()
+            elapsed = (end - start) * 1000
+
+            hand_stats = self.handler_metrics.get(name)
+
+            if hand_stats is None:
+
+                hand_stats = self.handler_metrics[name] = Metrics()
+
+            hand_stats.timing('queue_wait', (start - queued) * 1000)
+            hand_stats.timing('exec', elapsed)
+            hand_stats.timing('blocking', blocked[0] * 1000)
+            id_stats.timing('exec', elapsed)
+            id_stats.timing('blocking', blocked[0] * 1000)
+
+            if self.slow_threshold is not None and blocked[1] * 1000 > self.slow_threshold and id_num != -5:
+
+                self._slow_handler(name, id_num, elapsed, blocked[1] * 1000)
+
+    def _slow_handler(self, name, id_num, elapsed, blocked):
+
+        """
+        Sends a SLOW_HANDLER(-5) event, warning that a handler held up the event loop for too long.
+        The event is dropped if the queue is full, so a slow handler can't hold up the others.
+
+        :param name: Name of the slow handler
+        :type name: str
+        :param id_num: ID of the event the handler was given
+        :type id_num: int
+        :param elapsed: Milliseconds the handler took in total
+        :type elapsed: float
+        :param blocked: Milliseconds of the longest stretch the handler ran without awaiting
+        :type blocked: float
+        """
+
+        self.metrics.count('slow_handlers')
+
+        try:
+
+            self._queue_handler.put_nowait({'data': {'id': -5, 'content': codec.dumps(
+                {'handler': name, 'id': id_num, 'elapsed': elapsed, 'blocked': blocked,
+                 'threshold': self.slow_threshold})}})
+
+        except asyncio.QueueFull:
+
+            self.metrics.count('slow_handler_events_dropped')
+
+    def profile(self):
+
+        """
+        Summarises how long events waited, how long handlers took('exec'),
+        and how long they held up the event loop('blocking').
+        Timings are in milliseconds, and include the count, mean, p50, p99 and max.
+
+        :return: Dictionary containing the 'queue_wait', 'exec' and 'blocking' timings of each ID and each handler
+        :rtype: dict
+        """
+
+        return {'ids': {id_num: stats.summary()['timings'] for id_num, stats in self.id_metrics.items()},
+                'handlers': {name: stats.summary()['timings'] for name, stats in self.handler_metrics.items()}}
 
     def _resolve_id(self, id_val):
 
@@ -1594,20 +2506,86 @@ class KahootHandler(object):
 
         return id_val
 
-    def _make_hand_entry(self, id_num, hand_type, inst):
+    def _make_hand_entry(self, id_num, hand_type, inst, priority=0, placeholder=False):
 
         """
-        Makes a handler entry and registers it.
+        Makes a handler entry and registers it, after the handlers with the same or lower priority.
+        Placeholder entries at the ID are removed.
 
         :param id_num: ID to register handler to
         :type id_num: int
-        :param hand_type: Handler type, function(1) or class(0)
+        :param hand_type: Handler type, function(1), class(0) or process pool class(2)
         :type hand_type: int
         :param inst: Handler instance to add
         :type inst: class, function
+        :param priority: Handlers with lower priorities are given events first
+        :type priority: int
+        :param placeholder: Boolean determining if the entry is replaced once a handler is added
+        :type placeholder: bool
+        """
+
+        entries = [entry for entry in self.handlers.get(id_num, []) if not entry['placeholder']]
+
+        if placeholder and entries:
+
+            # Real handlers already registered, no need for a placeholder
+
+            return
+
+        index = len(entries)
+
+        while index and entries[index - 1]['priority'] > priority:
+
+            index -= 1
+
+        entries.insert(index, {"type": hand_type, "inst": inst, "priority": priority, "placeholder": placeholder})
+
+        self.handlers[id_num] = entries
+
+        self._build_table(id_num)
+
+    def _build_table(self, id_num):
+
+        """
+        Precomputes the callables we give events of the given ID to, and the names we time them under,
+        so dispatching doesn't have to look at handler types.
+        Handlers that do nothing('NullKahootHandler') are left out.
+
+        :param id_num: ID to build the table for
+        :type id_num: int
         """
 
-        self.handlers[id_num] = {"type": hand_type, "inst": inst}
+        table = []
+
+        for entry in self.handlers.get(id_num, []):
+
+            inst = entry['inst']
+
+            if entry['type'] == 0:
+
+                # Handler is KahootHandler class
+
+                if type(inst) is NullKahootHandler:
+
+                    continue
+
+                table.append((inst.hand, inst, type(inst).__name__))
+
+            elif entry['type'] == 1:
+
+                # Handler is method
+
+                name = getattr(inst, '__qualname__', repr(inst))
+
+                table.append((partial(inst, kahoot_instance=self.kahoot), inst, name))
+
+            elif entry['type'] == 2:
+
+                # Handler does its work in our process pool
+
+                table.append((partial(self._run_in_pool, inst), inst, type(inst).__name__))
+
+        self._table[id_num] = tuple(table)
 
     def _init_handlers(self):
 
@@ -1618,31 +2596,43 @@ class KahootHandler(object):
 
         for id_num in self.id_map:
 
-            self.add_handler(PrintKahootHandler(self.id_map[id_num]), id_num)
+            self._register(PrintKahootHandler(self.id_map[id_num]), id_num, placeholder=True)
 
         return
 
     async def _stop_handler(self, id_num):
 
         """
-        Stops a given Kahoot handler.
+        Stops the Kahoot handlers at a given ID.
         The ID can be an ID string or integer.
-        We will only stop the handler if it is a function.
+        We will only stop the handlers that are not functions.
 
-        :param id_num: ID of the handler to stop.
+        :param id_num: ID of the handlers to stop.
         :type id_num: str, int
         """
 
         id_num = self._resolve_id(id_num)
 
-        hand = self.handlers[id_num]['inst']
+        for entry in self.handlers.get(id_num, []):
 
-        if isfunction(hand):
+            await self._stop_entry(entry)
+
+        return
+
+    async def _stop_entry(self, entry):
+
+        """
+        Stops the handler of a given handler entry.
+        We will only stop the handler if it is not a function.
+
+        :param entry: Handler entry to stop
+        :type entry: dict
+        """
+
+        if entry['type'] == 1:
 
             # Is a function, ignoring
 
             return
 
-        await hand.stop()
-
-        return
+        await entry['inst'].stop()
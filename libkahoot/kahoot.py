@@ -2,7 +2,7 @@ import asyncio
 
 from libkahoot.api import KahootAPI
 from libkahoot.quiz import KahootInfo
-from libkahoot.handlers import KahootHandler
+from libkahoot.handlers import KahootHandler, EventQueue
 
 """
 Kahoot class binds all classes together.
@@ -15,20 +15,24 @@ Some minor notes:
         * api.py - Tools for interacting with kahoot
         * knet.py(Bad name?) - Low-level protocol objects for interacting with Kahoot
         * handlers.py - Registering and working with Kahoot handlers
+        * metrics.py - Timings and counters for measuring performance
+        * codec.py - Fast JSON encoding and decoding
+        * console.py - Reading user input without blocking
     
 """
 
 
 class Kahoot:
 
-    def __init__(self, pin, name, no_handlers=False, queue_maxsize=0):
+    def __init__(self, pin, name, no_handlers=False, queue_maxsize=0, transport='long-polling',
+                 url='https://kahoot.it/', ws_url=None):
 
-        self.queue = asyncio.Queue(maxsize=queue_maxsize)  # asyncio queue for requests
+        self.queue = EventQueue(maxsize=queue_maxsize)  # asyncio queue for requests, time critical events first
         self.no_handlers = no_handlers  # Boolean value determining if we want to use handlers
         self._auto_fetch_answers = False  # Value determining if we should fetch answers
 
         self.info = KahootInfo(pin, name, self.queue)  # Kahoot info class
-        self.api = KahootAPI(pin, self.queue, name)  # Kahoot API
+        self.api = KahootAPI(pin, self.queue, name, transport=transport, url=url, ws_url=ws_url)  # Kahoot API
         self.handlers = KahootHandler(self.queue, self)  # Kahoot Handler
         self.loop = None  # asyncio event loop
 
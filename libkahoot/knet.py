@@ -1,24 +1,562 @@
 from urllib import parse, request
-from urllib.error import URLError
-from http import cookiejar
-import json
+from http import cookiejar, client
+import time
+import os
+import base64
+import hashlib
+import struct
+import random
+import socket
 import asyncio
+import threading
+from io import BytesIO
 from functools import partial
 
+from libkahoot import codec
+from libkahoot.metrics import Metrics
+
 """
 This file contains low-level tools for communicating with kahoot.
 """
 
 
+class ConnectionPool:
+
+    """
+    A pool of persistent HTTP/1.1 connections, kept per host.
+
+    Connections are handed out by 'acquire' and given back with 'release'.
+    Idle connections older than 'idle_timeout' are evicted when the pool is next used,
+    and at most 'max_connections' idle connections are kept for each host.
+    If more connections are in use at once(For example, a long-poll and an answer),
+    the extra connections are still created, but they are closed instead of pooled when released.
+
+    The pool is used from executor threads, so all bookkeeping is done under a lock.
+    """
+
+    def __init__(self, max_connections=4, idle_timeout=30, timeout=None):
+
+        self.max_connections = max_connections  # Maximum number of idle connections kept per host
+        self.idle_timeout = idle_timeout  # Seconds a connection may sit idle before it is evicted
+        self.timeout = timeout  # Socket timeout given to new connections
+        self._idle = {}  # Dictionary mapping host keys to lists of [connection, time last used]
+        self._lock = threading.Lock()  # Lock protecting the idle lists
+
+    def acquire(self, scheme, host, port=None):
+
+        """
+        Gets a connection to the given host.
+        We reuse the most recently used idle connection if we have one,
+        otherwise a new connection is created.
+
+        :param scheme: URL scheme, 'http' or 'https'
+        :type scheme: str
+        :param host: Hostname to connect to
+        :type host: str
+        :param port: Port to connect to, None for the scheme default
+        :type port: int
+        :return: Tuple containing the connection, and a boolean determining if it was reused
+        :rtype: tuple
+        """
+
+        key = (scheme, host, port)
+
+        with self._lock:
+
+            self._evict(key)
+
+            idle = self._idle.get(key)
+
+            if idle:
+
+                # Reuse the warmest connection we have
+
+                return idle.pop()[0], True
+
+        return self._connect(scheme, host, port), False
+
+    def release(self, scheme, host, port, conn, reusable=True):
+
+        """
+        Gives a connection back to the pool.
+        If the connection can't be reused, or the pool for this host is full, then it is closed.
+
+        :param scheme: URL scheme the connection was acquired with
+        :type scheme: str
+        :param host: Hostname the connection was acquired with
+        :type host: str
+        :param port: Port the connection was acquired with
+        :type port: int
+        :param conn: Connection to give back
+        :type conn: client.HTTPConnection
+        :param reusable: Boolean determining if the connection can be reused
+        :type reusable: bool
+        """
+
+        key = (scheme, host, port)
+
+        if reusable:
+
+            with self._lock:
+
+                idle = self._idle.setdefault(key, [])
+
+                if len(idle) < self.max_connections:
+
+                    idle.append([conn, time.monotonic()])
+
+                    return
+
+        conn.close()
+
+    def close(self):
+
+        """
+        Closes every idle connection in the pool.
+        """
+
+        with self._lock:
+
+            for idle in self._idle.values():
+
+                for conn, _ in idle:
+
+                    conn.close()
+
+            self._idle.clear()
+
+    def _connect(self, scheme, host, port):
+
+        # Creates a new connection to the given host
+
+        if scheme == 'https':
+
+            return client.HTTPSConnection(host, port, timeout=self.timeout)
+
+        return client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _evict(self, key):
+
+        # Closes idle connections for the given key that have been sitting for too long
+        # MUST be called with the lock held!
+
+        idle = self._idle.get(key)
+
+        if not idle:
+
+            return
+
+        limit = time.monotonic() - self.idle_timeout
+
+        while idle and idle[0][1] < limit:
+
+            # Oldest connections are at the front of the list
+
+            idle.pop(0)[0].close()
+
+
+class AsyncHTTPResponse:
+
+    """
+    Response read from an AsyncHTTPConnection.
+    The body is read in full before the response is returned,
+    and the object mirrors the parts of http.client.HTTPResponse that we use.
+    """
+
+    def __init__(self, status, reason, version, msg):
+
+        self.status = status  # Status code of the response
+        self.reason = reason  # Reason phrase of the response
+        self.version = version  # HTTP version of the response, 10 or 11
+        self.msg = msg  # http.client.HTTPMessage containing the response headers
+        self.body = b''  # Body of the response
+        self.will_close = self._check_close()  # Boolean determining if the server will close the connection
+
+    def getheaders(self):
+
+        # Returns a list of (header, value) tuples
+
+        return list(self.msg.items())
+
+    def getheader(self, name, default=None):
+
+        # Returns the value of the given header
+
+        return self.msg.get(name, default)
+
+    def info(self):
+
+        # Returns the response headers, used by the cookie jar
+
+        return self.msg
+
+    def _check_close(self):
+
+        # Determines if the connection will be closed after this response
+
+        conn = self.msg.get('connection', '').lower()
+
+        if 'close' in conn:
+
+            return True
+
+        if self.version == 10:
+
+            return 'keep-alive' not in conn
+
+        return False
+
+
+class AsyncHTTPConnection:
+
+    """
+    A minimal HTTP/1.1 client connection built on asyncio streams.
+    Supports persistent connections, fixed length and chunked bodies.
+
+    The connection is opened lazily on the first request.
+    """
+
+    def __init__(self, scheme, host, port=None, timeout=None):
+
+        self.scheme = scheme  # URL scheme, 'http' or 'https'
+        self.host = host  # Hostname to connect to
+        self.port = port or (443 if scheme == 'https' else 80)  # Port to connect to
+        self.timeout = timeout  # Timeout for an entire request, None for no timeout
+        self._reader = None  # asyncio StreamReader of the connection
+        self._writer = None  # asyncio StreamWriter of the connection
+        self.sent = False  # Boolean determining if the last request was completely sent
+
+    async def connect(self):
+
+        """
+        Opens the connection, if it is not already open.
+        """
+
+        if self._writer is None:
+
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port,
+                                                                       ssl=self.scheme == 'https')
+
+    async def request(self, method, path, body=None, headers=None, timeout=None):
+
+        """
+        Sends a request and reads the response.
+
+        :param method: HTTP method to use
+        :type method: str
+        :param path: Path of the request, including the query string
+        :type path: str
+        :param body: Body of the request
+        :type body: bytes
+        :param headers: Headers to send with the request
+        :type headers: dict
+        :param timeout: Timeout for this request, leave blank to use the connection timeout
+        :type timeout: int, float
+        :return: Response to the request
+        :rtype: AsyncHTTPResponse
+        """
+
+        if timeout is None:
+
+            timeout = self.timeout
+
+        if timeout is None:
+
+            return await self._request(method, path, body, headers)
+
+        return await asyncio.wait_for(self._request(method, path, body, headers), timeout)
+
+    def is_stale(self):
+
+        """
+        Determines if the server has closed the connection.
+
+        :return: True if the connection is closed, False otherwise
+        :rtype: bool
+        """
+
+        return self._reader is not None and self._reader.at_eof()
+
+    def close(self):
+
+        """
+        Closes the connection.
+        """
+
+        if self._writer is not None:
+
+            self._writer.close()
+
+        self._reader = None
+        self._writer = None
+
+    async def _request(self, method, path, body, headers):
+
+        # Sends the request, and reads back the response
+
+        self.sent = False
+
+        await self.connect()
+
+        # Building the request head:
+
+        lines = ['{} {} HTTP/1.1'.format(method, path), 'Host: {}'.format(self.host)]
+
+        for key, value in (headers or {}).items():
+
+            lines.append('{}: {}'.format(key, value))
+
+        if body is not None:
+
+            lines.append('Content-Length: {}'.format(len(body)))
+
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        self._writer.write(head + body if body is not None else head)
+
+        await self._writer.drain()
+
+        self.sent = True
+
+        # Reading the response:
+
+        response = await self._read_head()
+
+        while 100 <= response.status < 200:
+
+            # Informational response, the real one follows
+
+            response = await self._read_head()
+
+        response.body = await self._read_body(method, response)
+
+        return response
+
+    async def _read_head(self):
+
+        # Reads the status line and the headers of a response
+
+        line = await self._reader.readline()
+
+        if not line:
+
+            raise client.RemoteDisconnected("Remote end closed connection without response")
+
+        try:
+
+            version, status, reason = (line.decode('latin-1').rstrip('\r\n').split(None, 2) + [''])[:3]
+            status = int(status)
+
+        except ValueError:
+
+            raise client.BadStatusLine(line)
+
+        head = await self._reader.readuntil(b'\r\n')
+
+        while head[-4:] != b'\r\n\r\n' and head != b'\r\n':
+
+            head = head + await self._reader.readuntil(b'\r\n')
+
+        msg = client.parse_headers(BytesIO(head))
+
+        return AsyncHTTPResponse(status, reason, 10 if version == 'HTTP/1.0' else 11, msg)
+
+    async def _read_body(self, method, response):
+
+        # Reads the body of the response, using the framing the server gave us
+
+        if method == 'HEAD' or response.status in (204, 304):
+
+            return b''
+
+        if 'chunked' in response.msg.get('transfer-encoding', '').lower():
+
+            body = []
+
+            while True:
+
+                size = int((await self._reader.readline()).split(b';', 1)[0], 16)
+
+                if size == 0:
+
+                    break
+
+                body.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+
+            # Skipping any trailers:
+
+            while (await self._reader.readline()) not in (b'\r\n', b''):
+
+                pass
+
+            return b''.join(body)
+
+        length = response.msg.get('content-length')
+
+        if length is not None:
+
+            return await self._reader.readexactly(int(length))
+
+        # No framing, reading until the server closes the connection
+
+        response.will_close = True
+
+        return await self._reader.read()
+
+
+class AsyncConnectionPool(ConnectionPool):
+
+    """
+    ConnectionPool that hands out AsyncHTTPConnections.
+    Connections the server has closed while idle are dropped when acquired.
+    """
+
+    def acquire(self, scheme, host, port=None):
+
+        while True:
+
+            conn, reused = super().acquire(scheme, host, port)
+
+            if reused and conn.is_stale():
+
+                # Server closed this one while it was idle
+
+                conn.close()
+
+                continue
+
+            return conn, reused
+
+    def _connect(self, scheme, host, port):
+
+        # Creates a new asyncio connection to the given host
+
+        return AsyncHTTPConnection(scheme, host, port, timeout=self.timeout)
+
+
+class CircuitBreaker:
+
+    """
+    Stops us from hammering an endpoint that keeps failing.
+
+    After 'threshold' failures in a row the circuit opens, and requests fail straight away.
+    Once 'cooldown' seconds have passed, a single request is let through to test the endpoint.
+    If it succeeds the circuit closes, otherwise it stays open for another cooldown.
+    """
+
+    def __init__(self, threshold=5, cooldown=5):
+
+        self.threshold = threshold  # Failures in a row before the circuit opens
+        self.cooldown = cooldown  # Seconds the circuit stays open before we test the endpoint again
+        self.failures = 0  # Failures in a row
+        self.opened = None  # Time when the circuit was opened, None if closed
+
+    def allow(self):
+
+        """
+        Determines if a request may be sent.
+
+        :return: True if the request may be sent, False if the circuit is open
+        :rtype: bool
+        """
+
+        if self.opened is None:
+
+            return True
+
+        if time.monotonic() - self.opened >= self.cooldown:
+
+            # Letting one request through, everyone else waits another cooldown
+
+            self.opened = time.monotonic()
+
+            return True
+
+        return False
+
+    def success(self):
+
+        """
+        Records a successful request, closing the circuit.
+        """
+
+        self.failures = 0
+        self.opened = None
+
+    def failure(self):
+
+        """
+        Records a failed request, opening the circuit if we have failed too often.
+
+        :return: True if this failure opened the circuit, False otherwise
+        :rtype: bool
+        """
+
+        self.failures += 1
+
+        if self.failures < self.threshold:
+
+            return False
+
+        opened = self.opened is None
+
+        self.opened = time.monotonic()
+
+        return opened
+
+
+def _can_resend(error, sent):
+
+    """
+    Determines if a request that failed on a reused connection may be sent again on a fresh one.
+
+    This is only safe if the server can't have acted on the request,
+    meaning the connection broke before the request was completely sent.
+    Once it is sent, a dropped connection looks the same whether or not the server processed the request,
+    so we never resend it. Timeouts are never resent either, the server may still be working on the request.
+
+    :param error: Exception raised by the request
+    :type error: Exception
+    :param sent: Boolean determining if the request was completely sent
+    :type sent: bool
+    :return: True if the request may be sent again, False otherwise
+    :rtype: bool
+    """
+
+    if isinstance(error, (TimeoutError, socket.timeout, asyncio.TimeoutError)):
+
+        return False
+
+    return not sent and isinstance(error, (OSError, EOFError, client.HTTPException))
+
+
 class URLWrap:
 
     """
     A class that acts as a wrapper to the urllib module,
     Providing some functionality convenient for communicating with the Kahoot API.
     This module uses long-pulling to interact with kahoot.
+
+    Requests are sent over persistent connections kept in a ConnectionPool,
+    so only the first request to a host pays for the TCP and TLS handshake.
+
+    Failed requests are retried with exponential backoff and jitter.
+    Requests that never reached the server are always retried,
+    but requests that may have reached it are only retried if the endpoint is safe to send to twice('resend_paths'),
+    so answers, logins and two-factor codes are never submitted twice.
+    Each endpoint has a CircuitBreaker, so an endpoint that keeps failing is not hammered.
+    Failures are reported to the event queue as CONNECTION_ERROR(-3) or SERVER_ERROR(-4) events.
+
+    We support two transports:
+
+        * 'asyncio' - Requests are made on the event loop using asyncio streams, no threads are used
+        * 'urllib' - Blocking http.client requests are ran in the default executor(Fallback)
     """
 
-    def __init__(self, queue):
+    TRANSPORTS = ('asyncio', 'urllib')  # Supported transports
+
+    def __init__(self, queue, max_connections=4, idle_timeout=30, transport='asyncio', metrics=None):
 
         self.url = 'https://kahoot.it/'  # Base URL to build off of
         self.headers = {
@@ -34,19 +572,60 @@ class URLWrap:
         self.kahoot_session = ''  # Session of Kahoot game, allows for automatic URL generation
         self.pin = 0  # Game pin of Kahoot game, allows for automatic URL generation
         self.cj = cookiejar.CookieJar()  # Cookie Jar instance for handling cookies
-        self.opener = request.build_opener(request.HTTPCookieProcessor(self.cj))  # URLLIB opener for handling cookies
+        self.max_connections = max_connections  # Maximum number of idle connections kept per host
+        self.idle_timeout = idle_timeout  # Seconds a connection may sit idle before it is evicted
+        self.timeout = None  # Default seconds we wait for a response, None to wait forever
+        self.transport = None  # Transport we are using to send requests
+        self.pool = None  # Pool of persistent connections
+        self.retries = 2  # Number of times we retry a failed request
+        self.backoff = 0.1  # Seconds of backoff before the first retry, doubled for every retry after
+        self.max_backoff = 2  # Most seconds of backoff we use
+        self.breaker_threshold = 5  # Failures in a row before we stop sending to an endpoint
+        self.breaker_cooldown = 5  # Seconds we stop sending to a failing endpoint for
+        self.resend_paths = ('/reserve/session/', '/connect')  # Paths that are safe to send to twice
+        self.metrics = metrics if metrics is not None else Metrics()  # Retry timings and outcomes
+        self._breakers = {}  # Dictionary mapping endpoints to CircuitBreakers
         self._urllib_queue = queue  # Queue of Kahoot Events
 
+        self.set_transport(transport)
+
+    def set_transport(self, transport):
+
+        """
+        Sets the transport used for sending requests.
+        Any pooled connections of the old transport are closed.
+
+        :param transport: Transport to use, 'asyncio' or 'urllib'
+        :type transport: str
+        :raises ValueError: If the transport is invalid
+        """
+
+        if transport not in self.TRANSPORTS:
+
+            raise ValueError("Invalid transport: {}".format(transport))
+
+        if self.pool is not None:
+
+            self.pool.close()
+
+        pool_type = AsyncConnectionPool if transport == 'asyncio' else ConnectionPool
+
+        self.transport = transport
+        self.pool = pool_type(max_connections=self.max_connections, idle_timeout=self.idle_timeout)
+
     def get_headers(self):
 
         # Function for returning headers of last made request
 
         return dict(self.response.getheaders())
 
-    async def send(self, url=None, data=None):
+    async def send(self, url=None, data=None, timeout=None, retries=None):
 
         # Wrapper method for the urllib module
         # Leave data blank for get request
+        # Data that is already encoded(bytes) is sent as is
+        # 'timeout' - Seconds we wait for a response, leave blank to use our default
+        # 'retries' - Number of times we retry on failure, leave blank to use our default
 
         # Generating URL if fields are blank
 
@@ -56,67 +635,698 @@ class URLWrap:
 
         # Encoding data into JSON format:
 
-        if data is not None:
+        if data is not None and not isinstance(data, bytes):
 
             data = self._json_encode(data)
 
-        # Generating Request object:
+        if retries is None:
 
-        req = request.Request(url, data=data, headers=self.headers)
+            retries = self.retries
 
-        try:
+        parts = parse.urlsplit(url)
+        endpoint = parts.netloc + parts.path
+        resend = self._may_resend(parts.path)
+        breaker = self._breakers.get(endpoint)
 
-            # Sending request to Kahoot
+        if breaker is None:
 
-            self.response = await asyncio.get_event_loop().run_in_executor(None, partial(self.opener.open, req))
+            breaker = self._breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
 
-        except URLError as e:
+        if not breaker.allow():
 
-            # Some errors occurred...
+            # Endpoint keeps failing, not even trying
 
-            if hasattr(e, 'reason'):
+            self.metrics.count('circuit_rejected')
 
-                # Connection problem
+            await self._gen_error_payload(-3, None, "Circuit open for {}".format(endpoint))
 
-                extra = e.reason
-                error_type = -3
+            return False, data
 
-            elif hasattr(e, 'code'):
+        attempt = 0
 
-                # Non-okay status code
+        while True:
 
-                extra = e.code
-                error_type = -4
+            body, error = await self._try_send(url, data, timeout, resend)
 
-            self._gen_error_payload(error_type, self._json_decode(self.response.read()), extra)
+            if error is None:
 
-            return False, data
+                break
 
-        # Returning contents in standard python format
+            error_type, contents, extra, retryable = error
 
-        data = self._json_decode(self.response.read())
+            if not retryable or attempt >= retries:
 
-        #print(data)
+                # Giving up
 
-        return True, data
+                if attempt > 0:
 
-    def _json_encode(self, data):
+                    self.metrics.count('retry_exhausted')
 
-        # Encodes data(usually a python dictionary/list) into JSON format
+                if breaker.failure():
 
-        return json.dumps(data).encode('utf-8')
+                    self.metrics.count('circuit_opened')
 
-    def _json_decode(self, data):
+                await self._gen_error_payload(error_type, contents, extra)
 
-        # Encodes JSON data into local python data types(Usually a list/dictionary)
+                return False, data
 
-        return json.loads(data)
+            # Backing off, with full jitter so many clients don't retry at once:
 
-    def _gen_error_payload(self, error_type, contents, extra):
+            attempt += 1
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
 
-        # Generates error payload, adds it to the event queue
-        # 'error_type' - Connection Issue/Server Issue
-        # 'contents' - Contents of the error
-        # 'extra' - Extra information about the error
+            self.metrics.count('retries')
+            self.metrics.timing('retry_delay', delay * 1000)
+
+            await asyncio.sleep(delay)
+
+        if attempt > 0:
+
+            self.metrics.count('retry_success')
+
+        breaker.success()
+
+        # Returning contents in standard python format
+
+        data = self._json_decode(body)
+
+        #print(data)
+
+        return True, data
+
+    def _may_resend(self, path):
+
+        # Determines if requests to the given path may be retried even if they reached the server
+
+        return any(path.startswith(prefix) if prefix.endswith('/') else path.endswith(prefix)
+                   for prefix in self.resend_paths)
+
+    async def _try_send(self, url, data, timeout, resend=False):
+
+        # Sends a request once
+        # Returns the body, and a tuple describing the error if one occurred:
+        # (error type, contents, extra info, boolean determining if we may retry)
+        # 'resend' - Boolean determining if the endpoint is safe to send to twice
+
+        self.response = None
+
+        try:
+
+            # Sending request to Kahoot
+
+            if self.transport == 'asyncio':
+
+                response, body = await self._open_async(url, data, timeout)
+
+            else:
+
+                response, body = await asyncio.get_event_loop().run_in_executor(
+                    None, partial(self._open, url, data, timeout))
+
+        except (asyncio.TimeoutError, socket.timeout) as e:
+
+            # Timed out, we already waited as long as we are willing to
+
+            return None, (-3, None, "Timed out: {}".format(e), False)
+
+        except (OSError, EOFError, client.HTTPException) as e:
+
+            # Connection problem, only retrying if the server can't have acted on the request
+
+            return None, (-3, None, str(e), resend or _can_resend(e, getattr(e, 'sent', True)))
+
+        self.response = response
+
+        if response.status >= 400:
+
+            # Non-okay status code, server errors might go away
+            # The server may have acted on the request before failing, unless it is throttling us
+
+            return body, (-4, body.decode('utf-8', 'replace'), response.status,
+                          response.status == 429 or (resend and response.status >= 500))
+
+        return body, None
+
+    def close(self):
+
+        """
+        Closes all pooled connections.
+        """
+
+        self.pool.close()
+
+    async def warm(self, url=None):
+
+        """
+        Opens a connection to the host of the given URL, and puts it in the pool.
+        The next request to that host can then skip the TCP and TLS handshake.
+
+        :param url: URL of the host to connect to, defaults to our base URL
+        :type url: str
+        :return: True if the connection was opened, False otherwise
+        :rtype: bool
+        """
+
+        parts = parse.urlsplit(url or self.url)
+        conn, reused = self.pool.acquire(parts.scheme, parts.hostname, parts.port)
+
+        try:
+
+            if self.transport == 'asyncio':
+
+                await conn.connect()
+
+            else:
+
+                await asyncio.get_event_loop().run_in_executor(None, conn.connect)
+
+        except (OSError, client.HTTPException):
+
+            conn.close()
+
+            return False
+
+        self.pool.release(parts.scheme, parts.hostname, parts.port, conn)
+
+        return True
+
+    def _prepare(self, url, data):
+
+        # Splits up the URL, and builds the headers for the request
+        # Returns the URL parts, the request path, the Request object and the headers
+
+        parts = parse.urlsplit(url)
+        path = parts.path or '/'
+
+        if parts.query:
+
+            path = path + '?' + parts.query
+
+        # Using a Request object so the cookie jar can work with the request
+
+        req = request.Request(url, data=data, headers=self.headers)
+
+        self.cj.add_cookie_header(req)
+
+        return parts, path, req, dict(req.header_items())
+
+    def _open(self, url, data, timeout=None):
+
+        # Sends a request over a pooled connection, and reads the whole response
+        # This method blocks, and should be ran in an executor
+        # Returns the response object and the response body
+
+        parts, path, req, headers = self._prepare(url, data)
+
+        if timeout is None:
+
+            timeout = self.timeout
+
+        while True:
+
+            conn, reused = self.pool.acquire(parts.scheme, parts.hostname, parts.port)
+
+            # Applying our timeout, to new and pooled connections alike:
+
+            conn.timeout = timeout
+
+            if conn.sock is not None:
+
+                conn.sock.settimeout(timeout)
+
+            sent = False
+
+            try:
+
+                conn.request(req.get_method(), path, body=data, headers=headers)
+
+                sent = True
+                response = conn.getresponse()
+                body = response.read()
+
+            except (OSError, client.HTTPException) as e:
+
+                conn.close()
+
+                if reused and _can_resend(e, sent):
+
+                    # Server closed the idle connection on us, retrying on a fresh one
+
+                    continue
+
+                # Letting our caller know if the request reached the server
+
+                e.sent = sent
+
+                raise
+
+            break
+
+        self.cj.extract_cookies(response, req)
+        self.pool.release(parts.scheme, parts.hostname, parts.port, conn, reusable=not response.will_close)
+
+        return response, body
+
+    async def _open_async(self, url, data, timeout=None):
+
+        # Like '_open', but sends the request using asyncio streams on the event loop
+        # Returns the response object and the response body
+
+        parts, path, req, headers = self._prepare(url, data)
+
+        if timeout is None:
+
+            timeout = self.timeout
+
+        while True:
+
+            conn, reused = self.pool.acquire(parts.scheme, parts.hostname, parts.port)
+
+            try:
+
+                response = await conn.request(req.get_method(), path, body=data, headers=headers, timeout=timeout)
+
+            except (OSError, EOFError, client.HTTPException) as e:
+
+                conn.close()
+
+                if reused and _can_resend(e, conn.sent):
+
+                    # Server closed the idle connection on us, retrying on a fresh one
+
+                    continue
+
+                # Letting our caller know if the request reached the server
+
+                e.sent = conn.sent
+
+                raise
+
+            except BaseException:
+
+                # Cancelled or timed out mid-request, the connection is in an unknown state
+
+                conn.close()
+
+                raise
+
+            break
+
+        self.cj.extract_cookies(response, req)
+        self.pool.release(parts.scheme, parts.hostname, parts.port, conn, reusable=not response.will_close)
+
+        return response, response.body
+
+    def _json_encode(self, data):
+
+        # Encodes data(usually a python dictionary/list) into JSON format
+
+        return codec.dumpb(data)
+
+    def _json_decode(self, data):
+
+        # Encodes JSON data into local python data types(Usually a list/dictionary)
+
+        return codec.loads(data)
+
+    async def _gen_error_payload(self, error_type, contents, extra):
+
+        # Generates error payload, adds it to the event queue
+        # The content is encoded like the content of Kahoot events, so handlers can treat them the same
+        # 'error_type' - Connection Issue/Server Issue
+        # 'contents' - Contents of the error
+        # 'extra' - Extra information about the error
+
+        if self._urllib_queue is None:
+
+            # Nobody to tell
+
+            return
+
+        await self._urllib_queue.put({'data': {'id': error_type,
+                                               'content': codec.dumps({'errorInfo': contents, 'extra': extra})}})
+
+
+class WebSocketWrap:
+
+    """
+    Sends CometD messages over a single, full-duplex websocket.
+
+    This class offers the same 'send' interface as URLWrap,
+    so KahootAPI can use either of them to talk CometD.
+    Replies are matched to the messages we sent by their channel and ID,
+    and every other message the server pushes to us is put straight into the event queue.
+
+    We borrow the headers, cookies, session info and event queue of a URLWrap instance,
+    as the Kahoot session still has to be reserved over HTTP.
+    """
+
+    GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'  # Magic value used for the websocket handshake
+
+    def __init__(self, http, url=None, on_push=None):
+
+        self.url = url  # URL of the websocket, None to generate it from the base URL of our URLWrap
+        self.on_push = on_push  # Coroutine function given server pushes, None to put them in the event queue
+        self._http = http  # URLWrap instance we get our session info from
+        self._reader = None  # asyncio StreamReader of the socket
+        self._writer = None  # asyncio StreamWriter of the socket
+        self._read_task = None  # Task reading frames from the socket
+        self._connect_lock = asyncio.Lock()  # Lock ensuring that we only open one socket at a time
+        self._pending = {}  # Dictionary mapping (channel, ID) to futures waiting for a reply
+        self._ws_queue = http._urllib_queue  # Queue of Kahoot Events
+
+    async def connect(self):
+
+        """
+        Opens the websocket, if it is not already open.
+        """
+
+        async with self._connect_lock:
+
+            if self._writer is not None:
+
+                return
+
+            url = self.url
+
+            if url is None:
+
+                # Using the websocket equivalent of the base URL
+
+                base = self._http.url
+                scheme = 'ws' if base.startswith('http:') else 'wss'
+
+                url = scheme + base[base.find(':'):] + 'cometd/' + str(self._http.pin) + '/' + self._http.kahoot_session
+
+            parts = parse.urlsplit(url)
+            secure = parts.scheme == 'wss'
+            port = parts.port or (443 if secure else 80)
+            path = parts.path or '/'
+
+            reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=secure)
+
+            # Getting our cookies, using the HTTP equivalent of the URL:
+
+            req = request.Request(('https' if secure else 'http') + url[len(parts.scheme):],
+                                  headers=self._http.headers)
+
+            self._http.cj.add_cookie_header(req)
+
+            key = base64.b64encode(os.urandom(16)).decode('ascii')
+            headers = {key: value for key, value in req.header_items()
+                       if key not in ('Content-type', 'Content-length')}
+
+            headers.update({'Upgrade': 'websocket', 'Connection': 'Upgrade', 'Sec-WebSocket-Key': key,
+                            'Sec-WebSocket-Version': '13', 'Origin': 'https://kahoot.it'})
+
+            lines = ['GET {} HTTP/1.1'.format(path), 'Host: {}'.format(parts.netloc)]
+            lines.extend('{}: {}'.format(name, value) for name, value in headers.items())
+
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+            await writer.drain()
+
+            # Checking the handshake response:
+
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = head.split(b'\r\n', 1)[0].split(None, 2)
+            msg = client.parse_headers(BytesIO(head.split(b'\r\n', 1)[1]))
+            accept = base64.b64encode(hashlib.sha1(key.encode('ascii') + self.GUID).digest()).decode('ascii')
+
+            if len(status) < 2 or status[1] != b'101' or msg.get('sec-websocket-accept') != accept:
+
+                writer.close()
+
+                raise ConnectionError("Websocket handshake failed: {}".format(head.split(b'\r\n', 1)[0]))
+
+            self._reader = reader
+            self._writer = writer
+            self._read_task = asyncio.ensure_future(self._read_loop())
+
+    async def send(self, url=None, data=None, keys=None, timeout=None, retries=None):
+
+        """
+        Sends CometD messages over the websocket, and waits for their replies.
+        The socket is opened if necessary.
+
+        :param url: Ignored, we only have the one socket. Kept for compatibility with URLWrap
+        :param data: List of CometD messages to send, or the messages already encoded as bytes
+        :type data: list, bytes
+        :param keys: (channel, ID) pairs of the replies to wait for, only used if 'data' is already encoded
+        :type keys: list
+        :param timeout: Seconds we wait for the replies, leave blank to use the default of our URLWrap
+        :type timeout: int, float
+        :param retries: Ignored, messages sent over the socket are never retried. Kept for compatibility with URLWrap
+        :return: Tuple containing a boolean determining if we were successful, and the list of replies
+        :rtype: tuple
+        """
+
+        loop = asyncio.get_event_loop()
+        futures = []
+
+        if not isinstance(data, bytes):
+
+            keys = [(message.get('channel'), str(message.get('id'))) for message in data]
+            data = self._http._json_encode(data)
+
+        try:
+
+            await self.connect()
+
+            for key in keys:
+
+                fut = loop.create_future()
+                self._pending[key] = fut
+
+                futures.append(fut)
+
+            self._send_frame(0x1, data)
+
+            if timeout is None:
+
+                timeout = self._http.timeout
+
+            replies = await asyncio.wait_for(self._wait_replies(futures), timeout)
+
+        except asyncio.CancelledError:
+
+            # We gave up waiting, nobody wants these replies anymore
+
+            for key in keys:
+
+                self._pending.pop(key, None)
+
+            raise
+
+        except (OSError, EOFError, asyncio.IncompleteReadError, asyncio.TimeoutError, client.HTTPException) as e:
+
+            # Connection problem
+
+            for key in keys:
+
+                self._pending.pop(key, None)
+
+            await self._http._gen_error_payload(-3, None, str(e))
+
+            return False, data
+
+        return True, list(replies)
+
+    @staticmethod
+    async def _wait_replies(futures):
+
+        # Waits for each reply in turn
+        # Unlike 'asyncio.gather', nothing is left with an unretrieved exception when we are cancelled
+
+        return [await fut for fut in futures]
+
+    async def close(self):
+
+        """
+        Closes the websocket, if it is open.
+        """
+
+        if self._writer is None:
+
+            return
+
+        try:
+
+            self._send_frame(0x8, struct.pack('!H', 1000))
+
+        except OSError:
+
+            pass
+
+        self._read_task.cancel()
+        self._shutdown(ConnectionError("Websocket closed"))
+
+    def _send_frame(self, opcode, payload):
+
+        # Sends a single, masked frame over the websocket
+
+        if self._writer is None:
+
+            raise ConnectionError("Websocket is not open")
+
+        length = len(payload)
+
+        if length < 126:
+
+            head = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+
+        elif length < 65536:
+
+            head = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+
+        else:
+
+            head = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+
+        mask = os.urandom(4)
+
+        self._writer.write(head + mask + self._mask(mask, payload))
+
+    async def _read_frame(self):
+
+        # Reads a single frame from the websocket
+        # Returns the FIN bit, the opcode and the payload
+
+        first, second = await self._reader.readexactly(2)
+        length = second & 0x7f
+
+        if length == 126:
+
+            length = struct.unpack('!H', await self._reader.readexactly(2))[0]
+
+        elif length == 127:
+
+            length = struct.unpack('!Q', await self._reader.readexactly(8))[0]
+
+        mask = await self._reader.readexactly(4) if second & 0x80 else None
+        payload = await self._reader.readexactly(length)
+
+        if mask is not None:
+
+            payload = self._mask(mask, payload)
+
+        return first & 0x80, first & 0x0f, payload
+
+    async def _read_loop(self):
+
+        # Reads messages from the websocket until it is closed,
+        # And hands them to whoever is waiting for them
+
+        error = ConnectionError("Websocket closed by server")
+        parts = []
+
+        try:
+
+            while True:
+
+                fin, opcode, payload = await self._read_frame()
+
+                if opcode == 0x9:
+
+                    # Ping, answering with a pong
+
+                    self._send_frame(0xA, payload)
+
+                    continue
+
+                if opcode == 0x8:
+
+                    # Server is closing the socket
+
+                    break
+
+                if opcode in (0x0, 0x1, 0x2):
+
+                    parts.append(payload)
+
+                    if not fin:
+
+                        # Message is fragmented, waiting for the rest
+
+                        continue
+
+                    message = b''.join(parts)
+                    parts = []
+
+                    await self._dispatch(self._http._json_decode(message))
+
+        except asyncio.CancelledError:
+
+            raise
+
+        except (OSError, EOFError, ValueError) as e:
+
+            error = e
+
+        # Anyone waiting on a reply will report the error
+
+        self._shutdown(error)
+
+    async def _dispatch(self, messages):
+
+        # Resolves futures waiting for replies, and queues everything else
+
+        if isinstance(messages, dict):
+
+            messages = [messages]
+
+        for message in messages:
+
+            fut = self._pending.pop((message.get('channel'), str(message.get('id'))), None)
+
+            if fut is not None:
+
+                if not fut.done():
+
+                    fut.set_result(message)
+
+                continue
+
+            if not message.get('channel', '').startswith('/meta/'):
+
+                # Server push, giving it to whoever wants it
+
+                if self.on_push is not None:
+
+                    await self.on_push(message)
+
+                    continue
+
+                await self._ws_queue.put(message)
+
+    def _shutdown(self, error):
+
+        # Closes the socket, and fails everyone waiting for a reply
+
+        if self._writer is not None:
+
+            self._writer.close()
+
+        self._reader = None
+        self._writer = None
+
+        for fut in self._pending.values():
+
+            if not fut.done():
+
+                fut.set_exception(error)
+
+        self._pending.clear()
+
+    @staticmethod
+    def _mask(mask, payload):
+
+        # Applies the websocket mask to the payload
+
+        if not payload:
+
+            return payload
+
+        key = (mask * (len(payload) // 4 + 1))[:len(payload)]
 
-        self._urllib_queue.put({'data': {'id': error_type, 'content': {'errorInfo': contents, 'extra': extra}}})
\ No newline at end of file
+        return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(len(payload), 'big')
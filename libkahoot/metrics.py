@@ -0,0 +1,151 @@
+from collections import deque
+
+"""
+Tools for measuring libkahoot.
+Keeps track of timings and counts, so we can see where our time goes.
+"""
+
+
+class LatencyStats(object):
+
+    """
+    Keeps a sliding window of timing samples, and summarises them.
+    Samples are usually in milliseconds.
+
+    The count, total and maximum cover every sample ever added,
+    while the percentiles only cover the samples in the window.
+    """
+
+    def __init__(self, window=256):
+
+        self.count = 0  # Number of samples added
+        self.total = 0  # Sum of all samples added
+        self.max = 0  # Largest sample added
+        self._samples = deque(maxlen=window)  # Sliding window of recent samples
+
+    def add(self, value):
+
+        """
+        Adds a sample.
+
+        :param value: Sample to add
+        :type value: int, float
+        """
+
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+        self._samples.append(value)
+
+    def mean(self):
+
+        """
+        Gets the mean of all samples added.
+
+        :return: Mean of the samples, 0 if we have none
+        :rtype: float
+        """
+
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, percent):
+
+        """
+        Gets a percentile of the samples in the window.
+
+        :param percent: Percentile to get, between 0 and 100
+        :type percent: int, float
+        :return: Value at the given percentile, 0 if we have no samples
+        :rtype: float
+        """
+
+        if not self._samples:
+
+            return 0
+
+        ordered = sorted(self._samples)
+
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def summary(self):
+
+        """
+        Summarises the samples.
+
+        :return: Dictionary containing the count, mean, p50, p99 and max
+        :rtype: dict
+        """
+
+        return {'count': self.count, 'mean': self.mean(), 'p50': self.percentile(50),
+                'p99': self.percentile(99), 'max': self.max}
+
+
+class Metrics(object):
+
+    """
+    A collection of named timings and counters.
+    """
+
+    def __init__(self, window=256):
+
+        self.window = window  # Size of the sliding window given to new timings
+        self.timings = {}  # Dictionary mapping names to LatencyStats
+        self.counters = {}  # Dictionary mapping names to counts
+
+    def timing(self, name, value):
+
+        """
+        Adds a sample to the given timing, creating it if necessary.
+
+        :param name: Name of the timing
+        :type name: str
+        :param value: Sample to add
+        :type value: int, float
+        """
+
+        stats = self.timings.get(name)
+
+        if stats is None:
+
+            stats = self.timings[name] = LatencyStats(window=self.window)
+
+        stats.add(value)
+
+    def count(self, name, amount=1):
+
+        """
+        Increments the given counter, creating it if necessary.
+
+        :param name: Name of the counter
+        :type name: str
+        :param amount: Amount to increment by
+        :type amount: int
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def get(self, name):
+
+        """
+        Gets the given timing.
+
+        :param name: Name of the timing
+        :type name: str
+        :return: LatencyStats of the timing, None if we have no samples for it
+        :rtype: LatencyStats
+        """
+
+        return self.timings.get(name)
+
+    def summary(self):
+
+        """
+        Summarises every timing and counter.
+
+        :return: Dictionary containing the counters, and a summary of each timing
+        :rtype: dict
+        """
+
+        return {'counters': dict(self.counters),
+                'timings': {name: stats.summary() for name, stats in self.timings.items()}}
@@ -0,0 +1,218 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import time
+import unittest
+
+from libkahoot import api
+
+"""
+Tests for the websocket transport, against a local stand-in for the Kahoot server.
+"""
+
+CHALLENGE = ("decode.call(this, 'J5ByoPzTq8OpfUmRW9MdWWHB1C4WKqtWu8szA7YZDHfGdgW0xWvQRn1nFLwBu3yh8f9hB4ROlwqBQfcs'); "
+             "function decode(message) {var offset = ((86 * 11) * 86) + 22; return 1;}")
+SESSION = 'sessiontoken1234567890'  # Decoded session token the stand-in hands out
+GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'  # Magic value used for the websocket handshake
+
+
+class StandIn:
+
+    """
+    Local stand-in for the Kahoot server.
+    Reserves sessions over HTTP, and speaks CometD over a websocket.
+    """
+
+    def __init__(self):
+
+        self.received = []  # CometD messages received over the websocket
+        self.paths = []  # Paths of the requests we received
+        self.server = None  # asyncio server we are running
+        self.port = None  # Port we are listening on
+        self._writers = []  # StreamWriters of the open websockets
+        self._connects = asyncio.Queue()  # '/meta/connect' messages waiting for a reply
+
+    async def start(self):
+
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def close(self):
+
+        for writer in self._writers:
+
+            writer.close()
+
+        self.server.close()
+
+    async def push(self, message):
+
+        # Answers the oldest '/meta/connect' with a server push
+
+        connect = await self._connects.get()
+
+        self._send(connect[1], [self._reply(connect[0]), message])
+
+    async def _handle(self, reader, writer):
+
+        try:
+
+            while True:
+
+                head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+                path = head[0].split(' ')[1]
+                headers = dict(line.split(': ', 1) for line in head[1:] if line)
+
+                self.paths.append(path)
+
+                if path.startswith('/reserve/session/'):
+
+                    await self._reserve(writer)
+
+                    continue
+
+                await self._websocket(reader, writer, headers)
+
+                return
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+
+            writer.close()
+
+    async def _reserve(self, writer):
+
+        # Hands out a session token, encoded with the solved challenge
+
+        solved = api.solve_challenge(CHALLENGE)
+        raw = base64.b64encode(bytes(ord(char) ^ ord(solved[num % len(solved)])
+                                     for num, char in enumerate(SESSION))).decode('ascii')
+        body = json.dumps({'challenge': CHALLENGE}).encode('utf-8')
+
+        writer.write('HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {}\r\n'
+                     'x-kahoot-session-token: {}\r\n\r\n'.format(len(body), raw).encode('latin-1') + body)
+
+        await writer.drain()
+
+    async def _websocket(self, reader, writer, headers):
+
+        accept = base64.b64encode(hashlib.sha1(headers['Sec-WebSocket-Key'].encode('ascii') + GUID).digest())
+
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+
+        self._writers.append(writer)
+
+        while True:
+
+            first, second = await reader.readexactly(2)
+            length = second & 0x7f
+
+            if length == 126:
+
+                length = struct.unpack('!H', await reader.readexactly(2))[0]
+
+            mask = await reader.readexactly(4)
+            payload = bytes(byte ^ mask[num % 4] for num, byte in enumerate(await reader.readexactly(length)))
+
+            if first & 0x0f == 0x8:
+
+                return
+
+            replies = []
+
+            for message in json.loads(payload):
+
+                self.received.append(message)
+
+                if message['channel'] == '/meta/connect':
+
+                    # Holding the poll until we have something to push
+
+                    await self._connects.put((message, writer))
+
+                    continue
+
+                replies.append(self._reply(message))
+
+            if replies:
+
+                self._send(writer, replies)
+
+    def _reply(self, message):
+
+        reply = {'channel': message['channel'], 'id': message.get('id'), 'successful': True,
+                 'advice': {'interval': 0, 'timeout': 30000, 'reconnect': 'retry'}}
+
+        if message['channel'] == '/meta/handshake':
+
+            reply['clientId'] = 'client1'
+            reply['ext'] = {'timesync': {'tc': message['ext']['timesync']['tc'], 'ts': int(time.time() * 1000),
+                                         'p': 0}}
+
+        return reply
+
+    def _send(self, writer, messages):
+
+        payload = json.dumps(messages).encode('utf-8')
+        head = struct.pack('!BB', 0x81, len(payload)) if len(payload) < 126 else \
+            struct.pack('!BBH', 0x81, 126, len(payload))
+
+        writer.write(head + payload)
+
+
+class WebSocketTransportTest(unittest.TestCase):
+
+    def test_handshake_push_and_answer(self):
+
+        asyncio.run(self._handshake_push_and_answer())
+
+    async def _handshake_push_and_answer(self):
+
+        stand_in = StandIn()
+
+        await stand_in.start()
+
+        queue = asyncio.Queue()
+        url = 'http://127.0.0.1:{}/'.format(stand_in.port)
+        kahoot = api.KahootAPI(12345, queue, 'bot', transport='websocket', url=url)
+
+        try:
+
+            await asyncio.wait_for(kahoot.start_async(), 5)
+
+            # Session was reserved over HTTP, and the handshake went over the websocket:
+
+            self.assertEqual(stand_in.paths, ['/reserve/session/12345', '/cometd/12345/' + SESSION])
+            self.assertEqual(kahoot._client_id, 'client1')
+
+            # Pushes reach the event queue:
+
+            await stand_in.push({'channel': '/service/player', 'id': 'push1',
+                                 'data': {'id': 2, 'content': json.dumps({'questionIndex': 0, 'quizType': 'quiz'})}})
+
+            event = await asyncio.wait_for(queue.get(), 5)
+
+            self.assertEqual(event['data']['id'], 2)
+
+            # Answers go out over the websocket, and are accepted:
+
+            self.assertTrue(await asyncio.wait_for(kahoot.answer_question(3), 5))
+
+            answers = [message for message in stand_in.received if message['channel'] == '/service/controller'
+                       and message['data']['type'] == 'message']
+
+            self.assertEqual(len(answers), 1)
+            self.assertEqual(json.loads(answers[0]['data']['content'])['choice'], 3)
+
+        finally:
+
+            await kahoot.stop_async()
+
+            stand_in.close()
+
+
+if __name__ == '__main__':
+
+    unittest.main()